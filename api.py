@@ -2,26 +2,106 @@
 FastAPI endpoints for GPU Job Queue Server
 """
 
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends, Header, Request
-from fastapi.responses import JSONResponse, Response
-from sqlalchemy.orm import Session
-from typing import Optional, List
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends, Header, Request, BackgroundTasks
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from sqlalchemy import func
+from sqlalchemy.orm import Session, load_only
+from typing import Optional, List, Tuple
 import uuid
 import os
+import json
 import yaml
 import asyncio
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import config
 import models
 import auth
 from queue_manager import queue_manager
+from job_events import job_events
 from ssh_executor import SSHExecutor
 from rate_limiter import rate_limiter, endpoint_protection
-from code_scanner import scan_code
+from code_scanner import scan_code_async
 
 
-app = FastAPI(title="GPU Job Queue Server")
+# Use the libyaml-backed loader when PyYAML was built with it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+UPLOAD_CHUNK_SIZE = 64 * 1024  # bytes per read when saving uploaded code
+
+# Columns needed for job summaries; skips stdout/stderr, which can be large
+JOB_SUMMARY_COLUMNS = load_only(
+    models.Job.job_id,
+    models.Job.user_id,
+    models.Job.competition_id,
+    models.Job.status,
+    models.Job.node_id,
+    models.Job.expected_time,
+    models.Job.created_at,
+    models.Job.started_at,
+    models.Job.completed_at,
+    models.Job.exit_code
+)
+
+# First fallback recheck while waiting on a job (seconds); grows to config.JOB_WAIT_RECHECK_INTERVAL
+JOB_WAIT_MIN_RECHECK = 0.05
+
+# Fields every job config.yaml must provide
+REQUIRED_FIELDS = frozenset(('competition_id', 'project_id', 'user_id', 'expected_time', 'token'))
+
+# Per-IP endpoint protection limits (requests per minute), for the
+# endpoints that had inline checks; all of them draw on one bucket per IP
+SUBMIT_ENDPOINT_LIMIT = 100
+DEFAULT_ENDPOINT_LIMIT = 200
+
+
+def _endpoint_limit(path: str) -> Optional[int]:
+    """Per-IP limit for a request path, or None if the path isn't protected"""
+    if path == "/api/submit":
+        return SUBMIT_ENDPOINT_LIMIT
+    if path.startswith(("/api/status/", "/api/results/")):
+        return DEFAULT_ENDPOINT_LIMIT
+    return None
+
+
+class RateLimitMiddleware:
+    """
+    General endpoint protection, applied once per request before routing
+    Plain ASGI so requests pass straight through to the app (no extra task
+    or body stream wrapper, which matters for long-waiting submissions)
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            limit = _endpoint_limit(scope["path"])
+            if limit is not None:
+                client = scope.get("client")
+                client_ip = client[0] if client else "unknown"
+                allowed, msg = endpoint_protection.check_endpoint_limit(
+                    client_ip, max_requests=limit, window_seconds=60
+                )
+                if not allowed:
+                    response = JSONResponse(status_code=429, content={"detail": msg})
+                    await response(scope, receive, send)
+                    return
+        
+        await self.app(scope, receive, send)
+
+
+app = FastAPI(title="GPU Job Queue Server", default_response_class=ORJSONResponse)
+app.add_middleware(RateLimitMiddleware)
+# Dashboard payloads are polled repeatedly and compress well
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+
+@app.on_event("startup")
+async def start_job_event_listener():
+    """Receive job completions from workers in other processes (PostgreSQL only)"""
+    job_events.start_listener()
 
 
 def get_db():
@@ -32,6 +112,29 @@ def get_db():
         db.close()
 
 
+async def require_auth(
+    authorization: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+) -> Tuple[str, bool]:
+    """
+    Validate the "Authorization: Bearer <token>" header
+    Returns (user_id, is_admin) or raises 401
+    """
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Authorization header required")
+    
+    if not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Invalid authorization header format")
+    
+    token = authorization.split(" ")[1]
+    token_result = auth.validate_token(token, db)
+    
+    if not token_result:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    
+    return token_result
+
+
 @app.post("/api/submit")
 async def submit_job(
     request: Request,
@@ -58,21 +161,17 @@ async def submit_job(
     Queue limit: 5 jobs per user at a time
     """
     try:
-        # General endpoint protection (100 requests/min per IP)
-        client_ip = request.client.host if request.client else "unknown"
-        allowed, msg = endpoint_protection.check_endpoint_limit(client_ip, max_requests=100, window_seconds=60)
-        if not allowed:
-            raise HTTPException(status_code=429, detail=msg)
-        
         # Read YAML config
         yaml_content = await config_file.read()
-        job_config = yaml.safe_load(yaml_content)
+        job_config = yaml.load(yaml_content, Loader=YAML_LOADER)
         
-        # Validate required fields
-        required_fields = ['competition_id', 'project_id', 'user_id', 'expected_time', 'token']
-        for field in required_fields:
-            if field not in job_config:
-                raise HTTPException(status_code=400, detail=f"Missing required field: {field}")
+        # Validate required fields (report all missing ones at once)
+        if not isinstance(job_config, dict):
+            raise HTTPException(status_code=400, detail="Job config must be a YAML mapping")
+        
+        missing = REQUIRED_FIELDS - job_config.keys()
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Missing required fields: {', '.join(sorted(missing))}")
         
         # Optional: local_results_path for downloading results to user's machine
         local_results_path = job_config.get('local_results_path', None)
@@ -89,12 +188,13 @@ async def submit_job(
             raise HTTPException(status_code=403, detail="Token does not belong to specified user_id")
         
         # SECURITY: Scan code for malicious content and ML relevance
-        code_content = (await code.read()).decode('utf-8')
-        
         if config.CODE_SCANNER_ENABLED:
-            scan_result = scan_code(
-                code_content, 
-                job_config['competition_id'], 
+            code_content = (await code.read()).decode('utf-8')
+            # Runs in a worker thread so AST parsing and the LLM call don't
+            # block the event loop for other requests
+            scan_result = await scan_code_async(
+                code_content,
+                job_config['competition_id'],
                 quick=config.CODE_SCANNER_QUICK_MODE
             )
             
@@ -110,19 +210,17 @@ async def submit_job(
                     detail=f"Code does not appear relevant to ML competition: {scan_result['explanation']}"
                 )
         
-        # Reset file pointer after reading
-        await code.seek(0)
-        
         # Rate limiting: Max 5 submissions per minute per user
         allowed, msg = rate_limiter.check_rate_limit(user_id, max_requests=5, window_seconds=60)
         if not allowed:
             raise HTTPException(status_code=429, detail=msg)
         
-        # Queue limit: Check if user already has a job in queue or running
-        existing_jobs = db.query(models.Job).filter(
+        # Queue limit: Check if user already has jobs in queue or running
+        # (LIMIT stops the index scan once the cap is reached)
+        existing_jobs = db.query(models.Job.job_id).filter(
             models.Job.user_id == user_id,
             models.Job.status.in_(['pending', 'running'])
-        ).count()
+        ).limit(5).count()
         
         if existing_jobs >= 5:
             raise HTTPException(
@@ -137,11 +235,12 @@ async def submit_job(
         job_dir = os.path.join(config.JOBS_DIR, job_id)
         os.makedirs(job_dir, exist_ok=True)
         
-        # Save code file
+        # Save code file, streamed in chunks from the upload's spooled temp file
         code_path = os.path.join(job_dir, "script.py")
-        code_content = await code.read()
+        await code.seek(0)
         with open(code_path, "wb") as f:
-            f.write(code_content)
+            while chunk := await code.read(UPLOAD_CHUNK_SIZE):
+                f.write(chunk)
         
         # Save YAML file
         yaml_path = os.path.join(job_dir, "config.yaml")
@@ -161,6 +260,8 @@ async def submit_job(
             yaml_path=yaml_path
         )
         
+        # Commit (not just flush) before queueing: a worker may pick the job
+        # up as soon as assign_job returns and looks it up in its own session
         db.add(new_job)
         db.commit()
         
@@ -185,83 +286,116 @@ async def submit_job(
         timeout = 14400  # 4 hours
         start_time = asyncio.get_event_loop().time()
         
-        while True:
-            db.refresh(new_job)
-            
-            if new_job.status in ["completed", "failed", "cancelled"]:
-                # If local_results_path is specified, save results.jsonl there
-                if local_results_path and new_job.status == "completed" and new_job.stdout:
-                    try:
-                        # Parse the results.jsonl from stdout
-                        results_content = new_job.stdout
-                        
-                        # Expand user path (handles ~)
-                        output_dir = os.path.expanduser(local_results_path)
-                        
-                        # Create directory if it doesn't exist
-                        os.makedirs(output_dir, exist_ok=True)
-                        
-                        # Generate filename
-                        from datetime import datetime
-                        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-                        filename = f"{new_job.user_id}_{new_job.competition_id}_{timestamp}.jsonl"
-                        output_path = os.path.join(output_dir, filename)
-                        
-                        # Save results to local path
-                        with open(output_path, 'w') as f:
-                            f.write(results_content)
-                        
-                        # Return with local_results_saved flag
-                        return {
-                            "job_id": job_id,
-                            "node_id": node_id,
-                            "status": new_job.status,
-                            "stdout": new_job.stdout,
-                            "stderr": new_job.stderr,
-                            "exit_code": new_job.exit_code,
-                            "started_at": new_job.started_at,
-                            "completed_at": new_job.completed_at,
-                            "local_results_saved": True,
-                            "local_results_path": output_path
-                        }
-                    except Exception as e:
-                        # If saving locally fails, still return the results but with error flag
-                        return {
-                            "job_id": job_id,
-                            "node_id": node_id,
-                            "status": new_job.status,
-                            "stdout": new_job.stdout,
-                            "stderr": new_job.stderr,
-                            "exit_code": new_job.exit_code,
-                            "started_at": new_job.started_at,
-                            "completed_at": new_job.completed_at,
-                            "local_results_saved": False,
-                            "local_results_error": str(e)
-                        }
+        # The worker sets this event whenever the job changes state, so the
+        # database is only re-read when something actually happened
+        job_event = job_events.register(job_id)
+        
+        # Fallback recheck backs off exponentially while the status is
+        # unchanged, in case events can't reach this process
+        recheck_delay = JOB_WAIT_MIN_RECHECK
+        last_status = None
+        
+        try:
+            while True:
+                # Only the status is needed to decide whether we're done
+                status = db.query(models.Job.status).filter(models.Job.job_id == job_id).scalar()
                 
-                return {
-                    "job_id": job_id,
-                    "node_id": node_id,
-                    "status": new_job.status,
-                    "stdout": new_job.stdout,
-                    "stderr": new_job.stderr,
-                    "exit_code": new_job.exit_code,
-                    "started_at": new_job.started_at,
-                    "completed_at": new_job.completed_at
-                }
-            
-            # Check timeout
-            elapsed = asyncio.get_event_loop().time() - start_time
-            if elapsed > timeout:
-                return {
-                    "job_id": job_id,
-                    "node_id": node_id,
-                    "status": new_job.status,
-                    "message": f"Timeout after {timeout}s. Job still {new_job.status}. Use /api/results/{job_id} to check later."
-                }
-            
-            # Wait before next check
-            await asyncio.sleep(0.5)
+                if status != last_status:
+                    last_status = status
+                    recheck_delay = JOB_WAIT_MIN_RECHECK
+                
+                if status in ["completed", "failed", "cancelled"]:
+                    # Load the full row (stdout/stderr) once for the response
+                    db.refresh(new_job)
+                    
+                    # If local_results_path is specified, save results.jsonl there
+                    if local_results_path and new_job.status == "completed" and new_job.stdout:
+                        try:
+                            # Parse the results.jsonl from stdout
+                            results_content = new_job.stdout
+                            
+                            # Expand user path (handles ~)
+                            output_dir = os.path.expanduser(local_results_path)
+                            
+                            # Create directory if it doesn't exist
+                            os.makedirs(output_dir, exist_ok=True)
+                            
+                            # Generate filename
+                            from datetime import datetime
+                            timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+                            filename = f"{new_job.user_id}_{new_job.competition_id}_{timestamp}.jsonl"
+                            output_path = os.path.join(output_dir, filename)
+                            
+                            # Save results to local path
+                            with open(output_path, 'w') as f:
+                                f.write(results_content)
+                            
+                            # Return with local_results_saved flag
+                            return {
+                                "job_id": job_id,
+                                "node_id": node_id,
+                                "status": new_job.status,
+                                "stdout": new_job.stdout,
+                                "stderr": new_job.stderr,
+                                "exit_code": new_job.exit_code,
+                                "started_at": new_job.started_at,
+                                "completed_at": new_job.completed_at,
+                                "local_results_saved": True,
+                                "local_results_path": output_path
+                            }
+                        except Exception as e:
+                            # If saving locally fails, still return the results but with error flag
+                            return {
+                                "job_id": job_id,
+                                "node_id": node_id,
+                                "status": new_job.status,
+                                "stdout": new_job.stdout,
+                                "stderr": new_job.stderr,
+                                "exit_code": new_job.exit_code,
+                                "started_at": new_job.started_at,
+                                "completed_at": new_job.completed_at,
+                                "local_results_saved": False,
+                                "local_results_error": str(e)
+                            }
+                    
+                    return {
+                        "job_id": job_id,
+                        "node_id": node_id,
+                        "status": new_job.status,
+                        "stdout": new_job.stdout,
+                        "stderr": new_job.stderr,
+                        "exit_code": new_job.exit_code,
+                        "started_at": new_job.started_at,
+                        "completed_at": new_job.completed_at
+                    }
+                
+                # Check timeout
+                elapsed = asyncio.get_event_loop().time() - start_time
+                if elapsed > timeout:
+                    return {
+                        "job_id": job_id,
+                        "node_id": node_id,
+                        "status": status,
+                        "message": f"Timeout after {timeout}s. Job still {status}. Use /api/results/{job_id} to check later."
+                    }
+                
+                # End the read transaction so the pooled connection is
+                # returned while we wait
+                db.commit()
+                
+                # Sleep until the worker signals a state change; the recheck
+                # delay is a safety net in case a notification is missed
+                try:
+                    await asyncio.wait_for(
+                        job_event.wait(),
+                        timeout=min(timeout - elapsed, recheck_delay)
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                job_event.clear()
+                recheck_delay = min(config.JOB_WAIT_RECHECK_INTERVAL, recheck_delay * 1.5)
+        finally:
+            job_events.unregister(job_id)
         
     except yaml.YAMLError as e:
         raise HTTPException(status_code=400, detail=f"Invalid YAML format: {str(e)}")
@@ -274,43 +408,24 @@ async def submit_job(
 @app.get("/api/status/{job_id}")
 async def get_job_status(
     request: Request, 
-    job_id: str, 
-    authorization: str = Header(None),
+    job_id: str,
+    auth_info: Tuple[str, bool] = Depends(require_auth),
     db: Session = Depends(get_db)
 ):
     """
     Get status of a job
     Authorization: Users can only view their own jobs, admins can view any job
     """
-    # Endpoint protection
-    client_ip = request.client.host if request.client else "unknown"
-    allowed, msg = endpoint_protection.check_endpoint_limit(client_ip, max_requests=200, window_seconds=60)
-    if not allowed:
-        raise HTTPException(status_code=429, detail=msg)
-    
     # Get job
-    job = db.query(models.Job).filter(models.Job.job_id == job_id).first()
+    job = db.query(models.Job).options(JOB_SUMMARY_COLUMNS).filter(models.Job.job_id == job_id).first()
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    # Authorization check
-    if authorization:
-        if authorization.startswith("Bearer "):
-            token = authorization.split(" ")[1]
-            token_result = auth.validate_token(token, db)
-            
-            if token_result:
-                user_id, is_admin = token_result
-                # Admin can view any job, regular users only their own
-                if not is_admin and job.user_id != user_id:
-                    raise HTTPException(status_code=403, detail="Not authorized to view this job")
-            else:
-                raise HTTPException(status_code=401, detail="Invalid or expired token")
-        else:
-            raise HTTPException(status_code=401, detail="Invalid authorization header format")
-    else:
-        raise HTTPException(status_code=401, detail="Authorization header required")
+    # Admin can view any job, regular users only their own
+    user_id, is_admin = auth_info
+    if not is_admin and job.user_id != user_id:
+        raise HTTPException(status_code=403, detail="Not authorized to view this job")
     
     queue_position = None
     if job.status == "pending" and job.node_id is not None:
@@ -332,42 +447,23 @@ async def get_job_status(
 async def get_job_results(
     request: Request, 
     job_id: str,
-    authorization: str = Header(None),
+    auth_info: Tuple[str, bool] = Depends(require_auth),
     db: Session = Depends(get_db)
 ):
     """
     Get results of a completed job
     Authorization: Users can only view their own jobs, admins can view any job
     """
-    # Endpoint protection
-    client_ip = request.client.host if request.client else "unknown"
-    allowed, msg = endpoint_protection.check_endpoint_limit(client_ip, max_requests=200, window_seconds=60)
-    if not allowed:
-        raise HTTPException(status_code=429, detail=msg)
-    
     # Get job
     job = db.query(models.Job).filter(models.Job.job_id == job_id).first()
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    # Authorization check
-    if authorization:
-        if authorization.startswith("Bearer "):
-            token = authorization.split(" ")[1]
-            token_result = auth.validate_token(token, db)
-            
-            if token_result:
-                user_id, is_admin = token_result
-                # Admin can view any job, regular users only their own
-                if not is_admin and job.user_id != user_id:
-                    raise HTTPException(status_code=403, detail="Not authorized to view this job")
-            else:
-                raise HTTPException(status_code=401, detail="Invalid or expired token")
-        else:
-            raise HTTPException(status_code=401, detail="Invalid authorization header format")
-    else:
-        raise HTTPException(status_code=401, detail="Authorization header required")
+    # Admin can view any job, regular users only their own
+    user_id, is_admin = auth_info
+    if not is_admin and job.user_id != user_id:
+        raise HTTPException(status_code=403, detail="Not authorized to view this job")
     
     return {
         "job_id": job.job_id,
@@ -383,25 +479,15 @@ async def get_job_results(
 @app.post("/api/cancel/{job_id}")
 async def cancel_job(
     job_id: str,
-    authorization: str = Header(...),
+    background_tasks: BackgroundTasks,
+    auth_info: Tuple[str, bool] = Depends(require_auth),
     db: Session = Depends(get_db)
 ):
     """
     Cancel a pending or running job
     Authorization: Users can only cancel their own jobs, admins can cancel any job
     """
-    # Extract token from header (format: "Bearer <token>")
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-    
-    token = authorization.split(" ")[1]
-    
-    # Validate token
-    token_result = auth.validate_token(token, db)
-    if not token_result:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-    
-    user_id, is_admin = token_result
+    user_id, is_admin = auth_info
     
     # Get job
     job = db.query(models.Job).filter(models.Job.job_id == job_id).first()
@@ -423,11 +509,13 @@ async def cancel_job(
             job.status = "cancelled"
             job.completed_at = datetime.utcnow()
             db.commit()
+            job_events.publish(job_id)
             return {"message": "Job cancelled successfully", "status": "cancelled"}
         else:
             # Job might have just started
             job.status = "cancelled"
             db.commit()
+            job_events.publish(job_id)
             return {"message": "Job marked for cancellation", "status": "cancelled"}
     
     elif job.status == "running":
@@ -435,20 +523,27 @@ async def cancel_job(
         job.status = "cancelled"
         db.commit()
         
-        # Try to kill immediately if we have PID
+        # Try to kill immediately if we have PID, after the response is sent
         if job.remote_pid and job.node_id is not None:
-            try:
-                executor = SSHExecutor(job.node_id)
-                if executor.connect():
-                    executor.kill_process(job.remote_pid)
-                    executor.cleanup_job_files(job_id)
-                    executor.disconnect()
-            except Exception as e:
-                print(f"Error killing process: {e}")
+            background_tasks.add_task(_kill_on_node, job.remote_pid, job.node_id, job_id)
         
         return {"message": "Job cancelled successfully", "status": "cancelled"}
 
 
+def _kill_on_node(remote_pid: int, node_id: int, job_id: str):
+    """Kill a cancelled job's process and remove its files (runs in background)"""
+    try:
+        executor = SSHExecutor(node_id)
+        if executor.connect():
+            try:
+                executor.kill_process(remote_pid)
+                executor.cleanup_job_files(job_id)
+            finally:
+                executor.disconnect()
+    except Exception as e:
+        print(f"Error killing process: {e}")
+
+
 @app.get("/api/nodes")
 async def get_node_stats():
     """Get statistics for all GPU nodes"""
@@ -462,33 +557,20 @@ async def list_jobs(
     user_id: Optional[str] = None,
     status: Optional[str] = None,
     limit: int = 50,
-    authorization: str = Header(None),
+    auth_info: Tuple[str, bool] = Depends(require_auth),
     db: Session = Depends(get_db)
 ):
     """
     List jobs with optional filtering
     Authorization: Users see only their own jobs, admins can see all jobs
     """
-    # Authorization check
-    if authorization:
-        if authorization.startswith("Bearer "):
-            token = authorization.split(" ")[1]
-            token_result = auth.validate_token(token, db)
-            
-            if token_result:
-                authenticated_user_id, is_admin = token_result
-                
-                # Regular users can only see their own jobs
-                if not is_admin:
-                    user_id = authenticated_user_id  # Force filter to authenticated user
-            else:
-                raise HTTPException(status_code=401, detail="Invalid or expired token")
-        else:
-            raise HTTPException(status_code=401, detail="Invalid authorization header format")
-    else:
-        raise HTTPException(status_code=401, detail="Authorization header required")
+    authenticated_user_id, is_admin = auth_info
+    
+    # Regular users can only see their own jobs
+    if not is_admin:
+        user_id = authenticated_user_id  # Force filter to authenticated user
     
-    query = db.query(models.Job)
+    query = db.query(models.Job).options(JOB_SUMMARY_COLUMNS)
     
     if user_id:
         query = query.filter(models.Job.user_id == user_id)
@@ -516,7 +598,7 @@ async def list_jobs(
 @app.get("/api/dashboard")
 async def get_dashboard(
     request: Request,
-    authorization: str = Header(None),
+    auth_info: Tuple[str, bool] = Depends(require_auth),
     db: Session = Depends(get_db)
 ):
     """
@@ -531,58 +613,59 @@ async def get_dashboard(
         - Recent activity
         - System health metrics
     """
-    # Check authorization
-    is_admin = False
-    user_id = None
-    
-    if authorization:
-        if authorization.startswith("Bearer "):
-            token = authorization.split(" ")[1]
-            token_result = auth.validate_token(token, db)
-            
-            if token_result:
-                user_id, is_admin = token_result
-            else:
-                raise HTTPException(status_code=401, detail="Invalid or expired token")
-        else:
-            raise HTTPException(status_code=401, detail="Invalid authorization header format")
-    else:
-        raise HTTPException(status_code=401, detail="Authorization header required")
+    user_id, is_admin = auth_info
     
-    # Get all jobs (filtered by user if not admin)
-    jobs_query = db.query(models.Job)
-    if not is_admin:
-        jobs_query = jobs_query.filter(models.Job.user_id == user_id)
+    # System-wide counters kept by the queue manager
+    job_snapshot = queue_manager.snapshot()
     
-    all_jobs = jobs_query.all()
+    # Job counts by status: admins get the system-wide counters, users their
+    # own counts aggregated in the database
+    if is_admin:
+        status_counts = job_snapshot['status_counts']
+    else:
+        status_counts = dict(db.query(models.Job.status, func.count()).filter(
+            models.Job.user_id == user_id
+        ).group_by(models.Job.status).all())
     
     # Job statistics by status
     job_stats = {
-        'total': len(all_jobs),
-        'pending': len([j for j in all_jobs if j.status == 'pending']),
-        'running': len([j for j in all_jobs if j.status == 'running']),
-        'completed': len([j for j in all_jobs if j.status == 'completed']),
-        'failed': len([j for j in all_jobs if j.status == 'failed']),
-        'cancelled': len([j for j in all_jobs if j.status == 'cancelled'])
+        'total': sum(status_counts.values()),
+        'pending': status_counts.get('pending', 0),
+        'running': status_counts.get('running', 0),
+        'completed': status_counts.get('completed', 0),
+        'failed': status_counts.get('failed', 0),
+        'cancelled': status_counts.get('cancelled', 0)
     }
     
     # User statistics (admin only)
     user_stats = {}
     if is_admin:
-        users = db.query(models.Job.user_id).distinct().all()
-        for (uid,) in users:
-            user_jobs = [j for j in all_jobs if j.user_id == uid]
-            user_stats[uid] = {
-                'total': len(user_jobs),
-                'pending': len([j for j in user_jobs if j.status == 'pending']),
-                'running': len([j for j in user_jobs if j.status == 'running']),
-                'completed': len([j for j in user_jobs if j.status == 'completed']),
-                'failed': len([j for j in user_jobs if j.status == 'failed'])
-            }
+        user_status_counts = db.query(
+            models.Job.user_id, models.Job.status, func.count()
+        ).group_by(models.Job.user_id, models.Job.status).all()
+        
+        for uid, status, count in user_status_counts:
+            stats = user_stats.setdefault(uid, {
+                'total': 0,
+                'pending': 0,
+                'running': 0,
+                'completed': 0,
+                'failed': 0
+            })
+            stats['total'] += count
+            if status in stats:
+                stats[status] += count
     
     # Node statistics
     node_stats = queue_manager.get_node_stats()
     
+    # Running jobs keyed by node, for the current job on each node
+    running_query = db.query(models.Job).options(JOB_SUMMARY_COLUMNS).filter(models.Job.status == 'running')
+    if not is_admin:
+        running_query = running_query.filter(models.Job.user_id == user_id)
+    
+    running_by_node = {j.node_id: j for j in running_query.order_by(models.Job.node_id).all()}
+    
     # Queue information
     queue_info = []
     for node_id in range(8):
@@ -590,16 +673,15 @@ async def get_dashboard(
         queue_time = queue_manager.get_total_queue_time(node_id)
         current_job = None
         
-        # Find current job on this node
-        for job in all_jobs:
-            if job.node_id == node_id and job.status == 'running':
-                current_job = {
-                    'job_id': job.job_id,
-                    'user_id': job.user_id,
-                    'competition_id': job.competition_id,
-                    'started_at': job.started_at.isoformat() if job.started_at else None
-                }
-                break
+        # Current job on this node
+        job = running_by_node.get(node_id)
+        if job:
+            current_job = {
+                'job_id': job.job_id,
+                'user_id': job.user_id,
+                'competition_id': job.competition_id,
+                'started_at': job.started_at
+            }
         
         # Check if node is busy (has running job)
         is_busy = current_job is not None
@@ -613,7 +695,7 @@ async def get_dashboard(
         })
     
     # Recent jobs (last 10)
-    recent_query = db.query(models.Job)
+    recent_query = db.query(models.Job).options(JOB_SUMMARY_COLUMNS)
     if not is_admin:
         recent_query = recent_query.filter(models.Job.user_id == user_id)
     
@@ -624,9 +706,9 @@ async def get_dashboard(
         'competition_id': j.competition_id,
         'status': j.status,
         'node_id': j.node_id,
-        'created_at': j.created_at.isoformat() if j.created_at else None,
-        'started_at': j.started_at.isoformat() if j.started_at else None,
-        'completed_at': j.completed_at.isoformat() if j.completed_at else None,
+        'created_at': j.created_at,
+        'started_at': j.started_at,
+        'completed_at': j.completed_at,
         'duration_seconds': (
             (j.completed_at - j.started_at).total_seconds()
             if j.started_at and j.completed_at
@@ -635,13 +717,21 @@ async def get_dashboard(
     } for j in recent_jobs]
     
     # Active jobs (running or pending)
-    active_query = db.query(models.Job).filter(
+    active_query = db.query(models.Job).options(JOB_SUMMARY_COLUMNS).filter(
         models.Job.status.in_(['pending', 'running'])
     )
     if not is_admin:
         active_query = active_query.filter(models.Job.user_id == user_id)
     
     active_jobs = active_query.order_by(models.Job.created_at.desc()).all()
+    
+    # Queue positions for all pending jobs in one pass over each node's queue
+    pending_by_node = {}
+    for j in active_jobs:
+        if j.status == 'pending' and j.node_id is not None:
+            pending_by_node.setdefault(j.node_id, []).append(j.job_id)
+    positions = queue_manager.get_positions(pending_by_node)
+    
     active_jobs_data = [{
         'job_id': j.job_id,
         'user_id': j.user_id,
@@ -649,9 +739,9 @@ async def get_dashboard(
         'status': j.status,
         'node_id': j.node_id,
         'expected_time': j.expected_time,
-        'created_at': j.created_at.isoformat() if j.created_at else None,
-        'started_at': j.started_at.isoformat() if j.started_at else None,
-        'queue_position': queue_manager.get_queue_position(j.job_id, j.node_id) if j.status == 'pending' else None
+        'created_at': j.created_at,
+        'started_at': j.started_at,
+        'queue_position': positions.get(j.job_id)
     } for j in active_jobs]
     
     # System health metrics
@@ -663,26 +753,27 @@ async def get_dashboard(
     avg_queue_time = sum(q['queue_time_seconds'] for q in queue_info) / len(queue_info) if queue_info else 0
     
     # Success rate (last 100 jobs)
-    recent_completed = db.query(models.Job).filter(
-        models.Job.status.in_(['completed', 'failed'])
-    ).order_by(models.Job.completed_at.desc()).limit(100).all()
+    success_rate = job_snapshot['success_rate']
     
-    success_count = len([j for j in recent_completed if j.status == 'completed'])
-    success_rate = (success_count / len(recent_completed) * 100) if recent_completed else 0
+    # Jobs created in the last 24 hours
+    if is_admin:
+        jobs_last_24h = job_snapshot['jobs_last_24h']
+    else:
+        jobs_last_24h = db.query(func.count(models.Job.job_id)).filter(
+            models.Job.created_at >= datetime.utcnow() - timedelta(days=1),
+            models.Job.user_id == user_id
+        ).scalar()
     
     health_metrics = {
         'node_utilization_percent': round(utilization, 1),
         'average_queue_time_seconds': round(avg_queue_time, 1),
         'total_active_jobs': len(active_jobs),
         'success_rate_percent': round(success_rate, 1),
-        'jobs_last_24h': len([
-            j for j in all_jobs 
-            if j.created_at and (datetime.utcnow() - j.created_at).total_seconds() < 86400
-        ])
+        'jobs_last_24h': jobs_last_24h
     }
     
     return {
-        'timestamp': datetime.utcnow().isoformat(),
+        'timestamp': datetime.utcnow(),
         'user_id': user_id,
         'is_admin': is_admin,
         'job_statistics': job_stats,
@@ -695,19 +786,23 @@ async def get_dashboard(
     }
 
 
+# Root response never changes, so serialize it once
+_ROOT_PAYLOAD = json.dumps({
+    "service": "GPU Job Queue Server",
+    "version": "1.0",
+    "endpoints": {
+        "submit": "POST /api/submit",
+        "status": "GET /api/status/{job_id}",
+        "results": "GET /api/results/{job_id}",
+        "cancel": "POST /api/cancel/{job_id}",
+        "nodes": "GET /api/nodes",
+        "jobs": "GET /api/jobs"
+    }
+}).encode()
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
-    return {
-        "service": "GPU Job Queue Server",
-        "version": "1.0",
-        "endpoints": {
-            "submit": "POST /api/submit",
-            "status": "GET /api/status/{job_id}",
-            "results": "GET /api/results/{job_id}",
-            "cancel": "POST /api/cancel/{job_id}",
-            "nodes": "GET /api/nodes",
-            "jobs": "GET /api/jobs"
-        }
-    }
+    return Response(content=_ROOT_PAYLOAD, media_type="application/json")
 
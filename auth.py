@@ -3,20 +3,39 @@ Authentication and token validation
 """
 
 import hashlib
+import threading
+from functools import lru_cache
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
+import config
 import models
 
 
+# Cache of validated tokens so clients polling with the same token skip
+# the DB: {token_hash: (user_id, is_admin, expires_at, cached_at)}
+_token_cache: Dict[str, Tuple[str, bool, Optional[datetime], float]] = {}
+_token_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1024)
 def hash_token(token: str) -> str:
-    """Hash a token using SHA256"""
+    """
+    Hash a token using BLAKE2b (256-bit digest)
+    Memoized: clients polling with the same token skip rehashing
+    """
+    return hashlib.blake2b(token.encode(), digest_size=32).hexdigest()
+
+
+def _legacy_hash_token(token: str) -> str:
+    """SHA256 hash used for tokens created before the switch to BLAKE2b"""
     return hashlib.sha256(token.encode()).hexdigest()
 
 
-def validate_token(token: str, db) -> Optional[tuple]:
+def _find_token(token: str, db) -> Optional[models.Token]:
     """
-    Validate token and return (user_id, is_admin) if valid
-    Returns None if invalid
+    Look up a token row by its hash
+    Rows still stored under the legacy SHA256 hash are rehashed on first use
     """
     token_hash = hash_token(token)
     
@@ -24,6 +43,55 @@ def validate_token(token: str, db) -> Optional[tuple]:
         models.Token.token_hash == token_hash
     ).first()
     
+    if token_obj:
+        return token_obj
+    
+    token_obj = db.query(models.Token).filter(
+        models.Token.token_hash == _legacy_hash_token(token)
+    ).first()
+    
+    if token_obj:
+        token_obj.token_hash = token_hash
+        db.commit()
+    
+    return token_obj
+
+
+def _invalidate_cached_tokens(token_hash: Optional[str] = None, user_id: Optional[str] = None):
+    """Drop cached validations for a token hash and/or every token of a user"""
+    with _token_cache_lock:
+        if token_hash:
+            _token_cache.pop(token_hash, None)
+        if user_id:
+            for cached_hash, entry in list(_token_cache.items()):
+                if entry[0] == user_id:
+                    del _token_cache[cached_hash]
+
+
+def validate_token(token: str, db) -> Optional[tuple]:
+    """
+    Validate token and return (user_id, is_admin) if valid
+    Returns None if invalid
+    
+    Valid tokens are cached for config.TOKEN_CACHE_TTL seconds, so a revocation
+    made outside this process (e.g. token_manager.py) takes effect within that window
+    """
+    token_hash = hash_token(token)
+    now = time.monotonic()
+    
+    with _token_cache_lock:
+        cached = _token_cache.get(token_hash)
+    
+    if cached:
+        user_id, is_admin, expires_at, cached_at = cached
+        if now - cached_at < config.TOKEN_CACHE_TTL:
+            # Expiry is re-checked on every hit
+            if expires_at and expires_at < datetime.utcnow():
+                return None
+            return (user_id, is_admin)
+    
+    token_obj = _find_token(token, db)
+    
     if not token_obj:
         return None
     
@@ -35,6 +103,16 @@ def validate_token(token: str, db) -> Optional[tuple]:
     if token_obj.expires_at and token_obj.expires_at < datetime.utcnow():
         return None
     
+    with _token_cache_lock:
+        if len(_token_cache) >= config.TOKEN_CACHE_MAX_SIZE:
+            # Drop stale entries first; start over only if all are fresh
+            for cached_hash, entry in list(_token_cache.items()):
+                if now - entry[3] >= config.TOKEN_CACHE_TTL:
+                    del _token_cache[cached_hash]
+            if len(_token_cache) >= config.TOKEN_CACHE_MAX_SIZE:
+                _token_cache.clear()
+        _token_cache[token_hash] = (token_obj.user_id, token_obj.is_admin, token_obj.expires_at, now)
+    
     return (token_obj.user_id, token_obj.is_admin)
 
 
@@ -59,6 +137,12 @@ def create_token(user_id: str, token: str, expires_at: Optional[datetime] = None
             if expires_at > max_expiry:
                 expires_at = max_expiry
         
+        # Check if this specific token hash already exists
+        existing_hash = _find_token(token, db)
+        
+        if existing_hash:
+            return False
+        
         # Revoke any existing tokens for this user (one token per user)
         existing_user_tokens = db.query(models.Token).filter(
             models.Token.user_id == user_id,
@@ -68,14 +152,6 @@ def create_token(user_id: str, token: str, expires_at: Optional[datetime] = None
         for old_token in existing_user_tokens:
             old_token.is_active = False
         
-        # Check if this specific token hash already exists
-        existing_hash = db.query(models.Token).filter(
-            models.Token.token_hash == token_hash
-        ).first()
-        
-        if existing_hash:
-            return False
-        
         new_token = models.Token(
             token_hash=token_hash,
             user_id=user_id,
@@ -86,6 +162,7 @@ def create_token(user_id: str, token: str, expires_at: Optional[datetime] = None
         
         db.add(new_token)
         db.commit()
+        _invalidate_cached_tokens(user_id=user_id)
         return True
     except Exception as e:
         print(f"Error creating token: {e}")
@@ -101,17 +178,14 @@ def revoke_token(token: str) -> bool:
     """
     db = next(models.get_db())
     try:
-        token_hash = hash_token(token)
-        
-        token_obj = db.query(models.Token).filter(
-            models.Token.token_hash == token_hash
-        ).first()
+        token_obj = _find_token(token, db)
         
         if not token_obj:
             return False
         
         token_obj.is_active = False
         db.commit()
+        _invalidate_cached_tokens(token_hash=token_obj.token_hash)
         return True
     except Exception as e:
         print(f"Error revoking token: {e}")
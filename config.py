@@ -25,16 +25,34 @@ SSH_USERNAME = "gpuuser"
 SSH_PASSWORD = "h100node"
 SSH_PORT = 22
 SSH_TIMEOUT = 30
+SSH_COMMAND_TIMEOUT = 120  # Seconds a remote command may run before execute_command gives up on it
+SSH_COMPRESSION = True  # zlib on GPU node connections (job logs compress well; the jump hop only carries encrypted bytes)
+SSH_POOL_MAX_PER_NODE = 2  # Connections kept open per GPU node (worker + API cancellations); stays under sshd MaxStartups
+SSH_DEEP_CHECK_INTERVAL = 300  # Seconds between health checks that run a remote command (others only ping the transport)
+SSH_POOL_WARM_ON_START = True  # Open a connection to every GPU node at startup, in parallel
 
 # Server Configuration
 SERVER_HOST = "0.0.0.0"
 SERVER_PORT = 8001
+REDIS_URL = None  # e.g. "redis://localhost:6379/0" to share rate limits across server processes (requires redis package)
+REDIS_SOCKET_TIMEOUT = 0.5  # Seconds before a Redis rate limit call gives up
+REDIS_RETRY_INTERVAL = 30  # Seconds to use in-process limits after a Redis failure
 DATABASE_URL = "sqlite:///./database.db"
+DATABASE_POOL_SIZE = 20  # Persistent connections kept in the pool
+DATABASE_MAX_OVERFLOW = 20  # Extra connections allowed under burst
+DATABASE_POOL_TIMEOUT = 30  # Seconds to wait for a free connection
+DATABASE_POOL_RECYCLE = 1800  # Seconds before a connection is replaced
+TOKEN_CACHE_TTL = 60  # Seconds a validated token is trusted without a DB lookup
+TOKEN_CACHE_MAX_SIZE = 4096  # Cached token validations kept in memory
+RATE_LIMIT_SWEEP_INTERVAL = 60  # Seconds between sweeps of idle rate limit buckets
+RATE_LIMIT_IDLE_TTL = 3600  # Seconds without requests before a rate limit bucket is dropped (must exceed every limit window)
 JOBS_DIR = "./jobs"
 
 # Job Configuration
 MAX_JOB_TIMEOUT_MULTIPLIER = 2  # Kill job if it runs 2x expected_time
 WORKER_POLL_INTERVAL = 1  # seconds
+JOB_WAIT_RECHECK_INTERVAL = 30  # seconds - max delay between fallback DB checks while waiting on a job
+DASHBOARD_STATS_RESYNC_INTERVAL = 300  # seconds - how often dashboard job counters are rebuilt from the database
 SSH_RETRY_ATTEMPTS = 3
 
 # LXC Configuration
@@ -4,7 +4,8 @@ Dashboard Example - Live system monitoring
 Demonstrates the /api/dashboard endpoint
 """
 
-import requests
+import asyncio
+import httpx
 import time
 import sys
 from datetime import datetime
@@ -111,26 +112,32 @@ def print_admin_dashboard(dashboard):
             node = f"N{job['node_id']}" if job['node_id'] is not None else "Q"
             print(f"  {status_icon} {comp:<20} {user:<10} {node:>2}")
 
-def fetch_dashboard(token):
+def make_client(token):
+    """HTTP client reused across refreshes so polls share one keep-alive connection"""
+    return httpx.AsyncClient(
+        base_url=BASE_URL,
+        headers={'Authorization': f'Bearer {token}'},
+        timeout=5.0
+    )
+
+async def fetch_dashboard(client):
     """Fetch dashboard data"""
-    headers = {'Authorization': f'Bearer {token}'}
-    
     try:
-        response = requests.get(f"{BASE_URL}/api/dashboard", headers=headers, timeout=5)
+        response = await client.get("/api/dashboard")
         response.raise_for_status()
         return response.json()
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"❌ Error fetching dashboard: {e}")
         return None
 
-def live_monitor(token, refresh_seconds=5):
+async def live_monitor(token, refresh_seconds=5):
     """Live monitoring loop"""
-    try:
+    async with make_client(token) as client:
         while True:
-            dashboard = fetch_dashboard(token)
+            dashboard = await fetch_dashboard(client)
             
             if not dashboard:
-                time.sleep(refresh_seconds)
+                await asyncio.sleep(refresh_seconds)
                 continue
             
             clear_screen()
@@ -144,15 +151,12 @@ def live_monitor(token, refresh_seconds=5):
                 print_user_dashboard(dashboard)
             
             print(f"\n🔄 Refreshing in {refresh_seconds}s... (Ctrl+C to exit)")
-            time.sleep(refresh_seconds)
-            
-    except KeyboardInterrupt:
-        print("\n\n👋 Dashboard closed")
-        sys.exit(0)
+            await asyncio.sleep(refresh_seconds)
 
-def single_fetch(token):
+async def single_fetch(token):
     """Single dashboard fetch"""
-    dashboard = fetch_dashboard(token)
+    async with make_client(token) as client:
+        dashboard = await fetch_dashboard(client)
     
     if not dashboard:
         sys.exit(1)
@@ -170,6 +174,7 @@ def single_fetch(token):
 
 def main():
     """Main entry point"""
+    global BASE_URL
     import argparse
     
     parser = argparse.ArgumentParser(description="GPU Job Queue Dashboard")
@@ -181,15 +186,18 @@ def main():
     
     args = parser.parse_args()
     
-    global BASE_URL
     BASE_URL = args.url
     
     if args.refresh > 0:
         print(f"Starting live monitor (refresh every {args.refresh}s)...")
         time.sleep(1)
-        live_monitor(args.token, args.refresh)
+        try:
+            asyncio.run(live_monitor(args.token, args.refresh))
+        except KeyboardInterrupt:
+            print("\n\n👋 Dashboard closed")
+            sys.exit(0)
     else:
-        single_fetch(args.token)
+        asyncio.run(single_fetch(args.token))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,119 @@
+"""
+Job Events - wakes API handlers waiting on a job when its status changes
+
+Waiters in this process are woken directly. With a PostgreSQL database,
+events are also sent over LISTEN/NOTIFY so handlers in other server
+processes wake up too.
+"""
+
+import asyncio
+import logging
+import select
+import threading
+import time
+from threading import Lock
+from typing import Dict, Tuple
+
+from sqlalchemy import text
+
+import models
+
+NOTIFY_CHANNEL = "job_done"
+
+
+class JobEvents:
+    def __init__(self):
+        # {job_id: (event, event loop the waiter runs on)}
+        self.events: Dict[str, Tuple[asyncio.Event, asyncio.AbstractEventLoop]] = {}
+        self.lock = Lock()
+        self.listener = None
+
+    def register(self, job_id: str) -> asyncio.Event:
+        """
+        Create an event for a job, bound to the running event loop
+        Must be called from a coroutine
+        """
+        event = asyncio.Event()
+        with self.lock:
+            self.events[job_id] = (event, asyncio.get_running_loop())
+        return event
+
+    def unregister(self, job_id: str):
+        """Drop the event for a job once nobody is waiting on it"""
+        with self.lock:
+            self.events.pop(job_id, None)
+
+    def notify(self, job_id: str):
+        """
+        Wake the handler in this process waiting on a job
+        Safe to call from worker threads; no-op if nobody is waiting
+        """
+        with self.lock:
+            entry = self.events.get(job_id)
+
+        if entry:
+            event, loop = entry
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Event loop already closed (server shutting down)
+                pass
+
+    def publish(self, job_id: str):
+        """
+        Announce a job state change to waiters in every server process
+        Call after the change has been committed
+        """
+        self.notify(job_id)
+
+        if models.engine.dialect.name != "postgresql":
+            return
+
+        try:
+            with models.engine.connect() as conn:
+                conn.execute(text("SELECT pg_notify(:channel, :job_id)"), {"channel": NOTIFY_CHANNEL, "job_id": job_id})
+                conn.commit()
+        except Exception as e:
+            # Waiters fall back to their periodic recheck
+            logging.warning(f"Failed to publish event for job {job_id}: {e}")
+
+    def start_listener(self):
+        """
+        Start a background thread relaying PostgreSQL notifications to local waiters
+        No-op for other databases, where workers always share the API process
+        """
+        if models.engine.dialect.name != "postgresql" or self.listener:
+            return
+
+        self.listener = threading.Thread(target=self._listen, daemon=True)
+        self.listener.start()
+
+    def _listen(self):
+        """Listener loop; reconnects after errors"""
+        while True:
+            conn = None
+            try:
+                conn = models.engine.raw_connection()
+                dbapi_conn = conn.dbapi_connection
+                dbapi_conn.autocommit = True
+                dbapi_conn.cursor().execute(f"LISTEN {NOTIFY_CHANNEL}")
+
+                while True:
+                    if select.select([dbapi_conn], [], [], 5) == ([], [], []):
+                        continue
+                    dbapi_conn.poll()
+                    while dbapi_conn.notifies:
+                        self.notify(dbapi_conn.notifies.pop(0).payload)
+            except Exception as e:
+                logging.warning(f"Job event listener error, reconnecting: {e}")
+                time.sleep(5)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.invalidate()
+                    except Exception:
+                        pass
+
+
+# Global job events instance
+job_events = JobEvents()
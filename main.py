@@ -6,10 +6,12 @@ import uvicorn
 import signal
 import sys
 import os
+import threading
 
 import config
 import models
 from worker import worker_pool
+from ssh_pool import ssh_pool
 from api import app
 
 
@@ -39,6 +41,11 @@ def main():
     worker_pool.start()
     print("✓ Workers started")
     
+    # Connect to all GPU nodes in the background so the first jobs don't
+    # wait on SSH handshakes
+    if config.SSH_POOL_WARM_ON_START:
+        threading.Thread(target=ssh_pool.warm, args=(range(len(config.GPU_NODES)),), daemon=True).start()
+    
     # Register signal handlers
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
@@ -2,9 +2,9 @@
 Database models for GPU Job Queue Server
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, Text
+from sqlalchemy import create_engine, event, Column, Integer, String, Boolean, DateTime, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import column_property, sessionmaker
 from datetime import datetime
 import config
 
@@ -20,7 +20,9 @@ class Job(Base):
     user_id = Column(String, nullable=False)
     expected_time = Column(Integer, nullable=False)  # seconds
     token_hash = Column(String, nullable=False)
-    status = Column(String, nullable=False)  # pending, running, completed, failed, cancelled
+    # pending, running, completed, failed, cancelled
+    # active_history keeps the previous value for the dashboard's status counters
+    status = column_property(Column(String, nullable=False), active_history=True)
     node_id = Column(Integer, nullable=True)  # 0-7, NULL if pending
     code_path = Column(String, nullable=True)
     yaml_path = Column(String, nullable=True)
@@ -31,6 +33,12 @@ class Job(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     started_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index("ix_jobs_user_id_status", "user_id", "status"),  # per-user status counts
+        Index("ix_jobs_created_at", "created_at"),  # recent activity
+        Index("ix_jobs_status_node_id", "status", "node_id"),  # running job per node
+    )
 
 
 class NodeState(Base):
@@ -53,7 +61,25 @@ class Token(Base):
 
 
 # Database setup
-engine = create_engine(config.DATABASE_URL, connect_args={"check_same_thread": False})
+engine = create_engine(
+    config.DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    pool_size=config.DATABASE_POOL_SIZE,
+    max_overflow=config.DATABASE_MAX_OVERFLOW,
+    pool_timeout=config.DATABASE_POOL_TIMEOUT,
+    pool_recycle=config.DATABASE_POOL_RECYCLE,
+    pool_pre_ping=True  # Replace connections that died while idle
+)
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_conn, connection_record):
+        """WAL lets readers run alongside the writer; NORMAL sync is safe under WAL"""
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -61,6 +87,10 @@ def init_db():
     """Initialize database and create tables"""
     Base.metadata.create_all(bind=engine)
     
+    # create_all skips tables that already exist, so add new indexes explicitly
+    for index in Job.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    
     # Initialize node states if not exists
     db = SessionLocal()
     try:
@@ -2,9 +2,17 @@
 Job Queue Manager - handles job assignment and queue operations
 """
 
-from collections import deque
+import heapq
+import queue
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta
 from threading import Lock
 from typing import Optional, List, Dict
+from sqlalchemy import event, func, inspect, update
+from sqlalchemy.orm import scoped_session
+import config
 import models
 
 
@@ -13,7 +21,78 @@ class QueueManager:
         # 8 queues, one per GPU node
         self.node_queues: List[deque] = [deque() for _ in range(8)]
         self.node_loads: List[int] = [0] * 8  # cumulative expected_time
+        # Min-heap of (load, node_id); entries whose load no longer matches
+        # node_loads are stale and skipped when popped
+        self.load_heap: List[tuple] = [(0, i) for i in range(8)]
+        # Cancelled jobs are tombstoned instead of removed from the deques;
+        # queued maps each live queued job to its node
+        self.queued: Dict[str, int] = {}
+        self.cancelled: set = set()
+        self.tombstones: List[int] = [0] * 8
         self.lock = Lock()
+        
+        # One reusable session per calling thread (workers, writer, API)
+        self.db = scoped_session(models.SessionLocal)
+        
+        # Node ids whose total_queue_time needs writing to the database
+        self.persist_queue: queue.Queue = queue.Queue()
+        self.persist_thread: Optional[threading.Thread] = None
+        
+        # System-wide job counters for the dashboard, updated as status
+        # changes commit and rebuilt from the jobs table periodically
+        self.stats_lock = Lock()
+        self.status_counts: Counter = Counter()
+        self.recent_created: deque = deque()  # created_at of jobs from the last 24h
+        self.recent_outcomes: deque = deque(maxlen=100)  # True for completed, False for failed
+        self.stats_built_at: Optional[float] = None
+        
+        event.listen(models.SessionLocal, "after_flush", self._collect_status_changes)
+        event.listen(models.SessionLocal, "after_commit", self._apply_status_changes)
+        event.listen(models.SessionLocal, "after_rollback", self._discard_status_changes)
+    
+    def _persist_load(self, node_id: int):
+        """
+        Queue a node's load for the background writer
+        Called after releasing the lock so DB commits don't block queue operations
+        """
+        if self.persist_thread is None:
+            with self.lock:
+                if self.persist_thread is None:
+                    self.persist_thread = threading.Thread(target=self._persist_loop, daemon=True)
+                    self.persist_thread.start()
+        self.persist_queue.put(node_id)
+    
+    def _persist_loop(self):
+        """Write queued node loads, coalescing updates that arrive together"""
+        while True:
+            node_ids = {self.persist_queue.get()}
+            while not self.persist_queue.empty():
+                node_ids.add(self.persist_queue.get_nowait())
+            
+            # Read loads at write time so the last write always has the latest value
+            with self.lock:
+                loads = {node_id: self.node_loads[node_id] for node_id in node_ids}
+            
+            db = self.db()
+            try:
+                for node_id, load in loads.items():
+                    db.execute(update(models.NodeState).where(
+                        models.NodeState.node_id == node_id
+                    ).values(total_queue_time=load))
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"Failed to persist node loads {sorted(node_ids)}: {e}")
+    
+    def _update_load(self, node_id: int, load: int):
+        """Set a node's load and record it in the heap (caller holds the lock)"""
+        self.node_loads[node_id] = load
+        heapq.heappush(self.load_heap, (load, node_id))
+        
+        # Drop stale entries once they pile up
+        if len(self.load_heap) > 4 * len(self.node_loads):
+            self.load_heap = [(l, i) for i, l in enumerate(self.node_loads)]
+            heapq.heapify(self.load_heap)
     
     def assign_job(self, job_id: str, expected_time: int) -> int:
         """
@@ -22,86 +101,129 @@ class QueueManager:
         """
         with self.lock:
             # Find node with minimum load
-            node_id = self.node_loads.index(min(self.node_loads))
+            while True:
+                load, node_id = heapq.heappop(self.load_heap)
+                if load == self.node_loads[node_id]:
+                    break
             
             # Add job to that node's queue
             self.node_queues[node_id].append(job_id)
-            self.node_loads[node_id] += expected_time
-            
-            # Update database
-            db = next(models.get_db())
-            try:
-                node_state = db.query(models.NodeState).filter(
-                    models.NodeState.node_id == node_id
-                ).first()
-                if node_state:
-                    node_state.total_queue_time = self.node_loads[node_id]
-                db.commit()
-            finally:
-                db.close()
-            
-            return node_id
+            self.queued[job_id] = node_id
+            self._update_load(node_id, load + expected_time)
+        
+        self._persist_load(node_id)
+        return node_id
     
     def get_next_job(self, node_id: int) -> Optional[str]:
         """Get next job from node's queue"""
         with self.lock:
-            if self.node_queues[node_id]:
-                job_id = self.node_queues[node_id].popleft()
+            node_queue = self.node_queues[node_id]
+            while node_queue:
+                job_id = node_queue.popleft()
+                if job_id in self.cancelled:
+                    self.cancelled.discard(job_id)
+                    self.tombstones[node_id] -= 1
+                    continue
+                self.queued.pop(job_id, None)
                 return job_id
             return None
     
+    def requeue_front(self, node_id: int, job_id: str):
+        """Put a job taken by get_next_job back at the front of its queue"""
+        with self.lock:
+            self.node_queues[node_id].appendleft(job_id)
+            self.queued[job_id] = node_id
+    
     def remove_job(self, job_id: str, node_id: int, expected_time: int) -> bool:
         """
         Remove job from queue (for cancellation)
         Returns: True if job was in queue and removed
         """
         with self.lock:
-            if job_id in self.node_queues[node_id]:
-                self.node_queues[node_id].remove(job_id)
-                self.node_loads[node_id] -= expected_time
-                
-                # Update database
-                db = next(models.get_db())
-                try:
-                    node_state = db.query(models.NodeState).filter(
-                        models.NodeState.node_id == node_id
-                    ).first()
-                    if node_state:
-                        node_state.total_queue_time = self.node_loads[node_id]
-                    db.commit()
-                finally:
-                    db.close()
-                
-                return True
-            return False
+            if self.queued.get(job_id) != node_id:
+                return False
+            del self.queued[job_id]
+            self.cancelled.add(job_id)
+            self.tombstones[node_id] += 1
+            self._update_load(node_id, self.node_loads[node_id] - expected_time)
+            
+            # Compact once a quarter of the queue is tombstones
+            if self.tombstones[node_id] * 4 > len(self.node_queues[node_id]):
+                self._compact(node_id)
+        
+        self._persist_load(node_id)
+        return True
+    
+    def _compact(self, node_id: int):
+        """Drop tombstoned jobs from a node's queue (caller holds the lock)"""
+        live = deque()
+        for job_id in self.node_queues[node_id]:
+            if job_id in self.cancelled:
+                self.cancelled.discard(job_id)
+            else:
+                live.append(job_id)
+        self.node_queues[node_id] = live
+        self.tombstones[node_id] = 0
+    
+    def _live_jobs(self, node_id: int):
+        """Iterate a node's queued jobs in order, skipping tombstones (caller holds the lock)"""
+        if not self.tombstones[node_id]:
+            return iter(self.node_queues[node_id])
+        return (job_id for job_id in self.node_queues[node_id] if job_id not in self.cancelled)
     
     def job_completed(self, node_id: int, expected_time: int):
         """Update load when job completes"""
         with self.lock:
-            self.node_loads[node_id] = max(0, self.node_loads[node_id] - expected_time)
-            
-            # Update database
-            db = next(models.get_db())
-            try:
-                node_state = db.query(models.NodeState).filter(
-                    models.NodeState.node_id == node_id
-                ).first()
-                if node_state:
-                    node_state.total_queue_time = self.node_loads[node_id]
-                    node_state.is_busy = False
-                    node_state.current_job_id = None
-                db.commit()
-            finally:
-                db.close()
+            self._update_load(node_id, max(0, self.node_loads[node_id] - expected_time))
+        
+        self._persist_load(node_id)
+        
+        # Workers check is_busy before starting the next job, so free the
+        # node synchronously rather than through the background writer
+        db = self.db()
+        try:
+            db.execute(update(models.NodeState).where(
+                models.NodeState.node_id == node_id
+            ).values(is_busy=False, current_job_id=None))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
     
     def get_queue_position(self, job_id: str, node_id: int) -> Optional[int]:
         """Get position of job in queue (0-indexed)"""
         with self.lock:
-            try:
-                queue_list = list(self.node_queues[node_id])
-                return queue_list.index(job_id)
-            except ValueError:
+            if self.queued.get(job_id) != node_id:
                 return None
+            for position, queued_id in enumerate(self._live_jobs(node_id)):
+                if queued_id == job_id:
+                    return position
+            return None
+    
+    def get_positions(self, jobs_by_node: Dict[int, List[str]]) -> Dict[str, int]:
+        """
+        Get queue positions (0-indexed) for many jobs at once
+        Args: {node_id: [job_id, ...]}
+        Returns: {job_id: position} for the jobs still queued
+        """
+        positions = {}
+        with self.lock:
+            for node_id, job_ids in jobs_by_node.items():
+                wanted = set(job_ids)
+                for position, job_id in enumerate(self._live_jobs(node_id)):
+                    if job_id in wanted:
+                        positions[job_id] = position
+        return positions
+    
+    def get_queue_size(self, node_id: int) -> int:
+        """Get number of jobs waiting in node's queue"""
+        with self.lock:
+            return len(self.node_queues[node_id]) - self.tombstones[node_id]
+    
+    def get_total_queue_time(self, node_id: int) -> int:
+        """Get cumulative expected_time of jobs assigned to node"""
+        with self.lock:
+            return self.node_loads[node_id]
     
     def get_node_stats(self) -> List[Dict]:
         """Get statistics for all nodes"""
@@ -110,12 +232,97 @@ class QueueManager:
             for i in range(8):
                 stats.append({
                     "node_id": i,
-                    "queue_length": len(self.node_queues[i]),
+                    "queue_length": len(self.node_queues[i]) - self.tombstones[i],
                     "total_wait_time": self.node_loads[i],
-                    "jobs_in_queue": list(self.node_queues[i])
+                    "jobs_in_queue": list(self._live_jobs(i))
                 })
             return stats
 
+    
+    def _collect_status_changes(self, session, flush_context):
+        """Remember job status changes flushed in a session until it commits"""
+        changes = session.info.setdefault('job_status_changes', [])
+        for obj in session.new:
+            if isinstance(obj, models.Job):
+                changes.append((None, obj.status))
+        for obj in session.dirty:
+            if isinstance(obj, models.Job):
+                history = inspect(obj).attrs.status.history
+                if history.added:
+                    old_status = history.deleted[0] if history.deleted else None
+                    changes.append((old_status, history.added[0]))
+    
+    def _apply_status_changes(self, session):
+        """Fold committed job status changes into the counters"""
+        changes = session.info.pop('job_status_changes', None)
+        if not changes:
+            return
+        
+        now = datetime.utcnow()
+        with self.stats_lock:
+            for old_status, new_status in changes:
+                if old_status == new_status:
+                    continue
+                if old_status is None:
+                    self.recent_created.append(now)
+                else:
+                    self.status_counts[old_status] -= 1
+                self.status_counts[new_status] += 1
+                if new_status in ('completed', 'failed'):
+                    self.recent_outcomes.append(new_status == 'completed')
+    
+    def _discard_status_changes(self, session):
+        """Forget status changes from a rolled back transaction"""
+        session.info.pop('job_status_changes', None)
+    
+    def _rebuild_stats(self):
+        """Reload the counters from the jobs table"""
+        cutoff = datetime.utcnow() - timedelta(days=1)
+        
+        db = self.db()
+        try:
+            counts = Counter(dict(
+                db.query(models.Job.status, func.count()).group_by(models.Job.status).all()
+            ))
+            created = [created_at for (created_at,) in db.query(models.Job.created_at).filter(
+                models.Job.created_at >= cutoff
+            ).order_by(models.Job.created_at)]
+            outcomes = [status == 'completed' for (status,) in db.query(models.Job.status).filter(
+                models.Job.status.in_(['completed', 'failed'])
+            ).order_by(models.Job.completed_at.desc()).limit(100)]
+        finally:
+            # End the read transaction so the connection goes back to the pool
+            db.rollback()
+        
+        with self.stats_lock:
+            self.status_counts = counts
+            self.recent_created = deque(created)
+            self.recent_outcomes = deque(reversed(outcomes), maxlen=100)
+            self.stats_built_at = time.monotonic()
+    
+    def snapshot(self) -> Dict:
+        """
+        System-wide job statistics without scanning the jobs table
+        Counters are rebuilt every DASHBOARD_STATS_RESYNC_INTERVAL seconds to
+        correct drift from changes made by other processes
+        Returns: {'status_counts': {status: count}, 'success_rate': percent
+                  over the last 100 finished jobs, 'jobs_last_24h': count}
+        """
+        if self.stats_built_at is None or time.monotonic() - self.stats_built_at > config.DASHBOARD_STATS_RESYNC_INTERVAL:
+            self._rebuild_stats()
+        
+        cutoff = datetime.utcnow() - timedelta(days=1)
+        with self.stats_lock:
+            while self.recent_created and self.recent_created[0] < cutoff:
+                self.recent_created.popleft()
+            
+            outcomes = self.recent_outcomes
+            return {
+                'status_counts': {status: count for status, count in self.status_counts.items() if count > 0},
+                'success_rate': (sum(outcomes) / len(outcomes) * 100) if outcomes else 0,
+                'jobs_last_24h': len(self.recent_created)
+            }
+
 
 # Global queue manager instance
 queue_manager = QueueManager()
@@ -2,86 +2,270 @@
 Rate limiting and security middleware
 """
 
+import math
 import time
-from collections import defaultdict
-from datetime import datetime, timedelta
-from typing import Dict, Tuple
+import logging
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 import threading
+import config
+
+
+# Independent users/identifiers hash to different stripes so they don't
+# contend on one lock (power of two for the mask)
+LOCK_STRIPES = 64
+
+
+def _start_sweeper(locks: List[threading.Lock], bucket_maps: List[dict], denied: Dict[str, tuple]):
+    """
+    Periodically drop buckets idle for RATE_LIMIT_IDLE_TTL seconds
+    An idle bucket has refilled completely, so removing it changes nothing
+    and memory stays bounded by active users instead of everyone ever seen
+    Expired denials are dropped too
+    """
+    def sweep():
+        while True:
+            time.sleep(config.RATE_LIMIT_SWEEP_INTERVAL)
+            now = time.time()
+            cutoff = now - config.RATE_LIMIT_IDLE_TTL
+            for lock, buckets in zip(locks, bucket_maps):
+                with lock:
+                    for key in [key for key, bucket in buckets.items() if bucket[1] < cutoff]:
+                        del buckets[key]
+            for key in [key for key, entry in list(denied.items()) if entry[0] <= now]:
+                denied.pop(key, None)
+    
+    threading.Thread(target=sweep, daemon=True).start()
+
+
+# Refusal messages per (max_requests, window_seconds); only the retry delay
+# is filled in per request
+@lru_cache(maxsize=64)
+def _user_deny_template(max_requests: int, window_seconds: int) -> str:
+    return f"Rate limit exceeded. Maximum {max_requests} requests per {window_seconds}s. Retry after {{}}s."
+
+
+@lru_cache(maxsize=64)
+def _endpoint_deny_template(max_requests: int, window_seconds: int) -> str:
+    return f"Too many requests. Maximum {max_requests} per {window_seconds}s. Retry after {{}}s."
+
+
+# Atomic token-bucket refill + consume
+# KEYS[1] = bucket key, ARGV = {capacity, rate (tokens/s), now, cost}
+# Returns {allowed (0/1), tokens left (as string to keep the fraction)}
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'last_ts')
+local tokens = tonumber(state[1])
+local last_ts = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+    last_ts = now
+end
+
+tokens = math.min(capacity, tokens + math.max(0, now - last_ts) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'last_ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisTokenBucket:
+    """
+    Token buckets stored in Redis, shared by every server process
+    One round-trip per check; refill and consume happen atomically in Lua
+    After a failure Redis is skipped for REDIS_RETRY_INTERVAL seconds so an
+    outage doesn't add a timeout to every request
+    """
+    
+    def __init__(self, url: str):
+        import redis
+        self.client = redis.Redis.from_url(
+            url,
+            socket_timeout=config.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=config.REDIS_SOCKET_TIMEOUT
+        )
+        self.script = self.client.register_script(_TOKEN_BUCKET_LUA)
+        self.retry_at = 0.0
+    
+    def consume(self, key: str, capacity: int, rate: float) -> Optional[Tuple[bool, float]]:
+        """
+        Take one token from the bucket at key
+        Returns: (allowed, tokens left), or None if Redis is unavailable and
+                 the caller should use its in-process limit
+        """
+        if time.monotonic() < self.retry_at:
+            return None
+        try:
+            allowed, tokens = self.script(keys=[key], args=[capacity, rate, time.time(), 1])
+        except Exception as e:
+            self.retry_at = time.monotonic() + config.REDIS_RETRY_INTERVAL
+            logging.warning(f"Redis rate limit check failed, using in-process limits for {config.REDIS_RETRY_INTERVAL}s: {e}")
+            return None
+        return bool(allowed), float(tokens)
+
 
 class RateLimiter:
-    def __init__(self):
-        # {user_id: [(timestamp, count), ...]}
-        self.user_requests: Dict[str, list] = defaultdict(list)
-        self.lock = threading.Lock()
+    def __init__(self, backend: Optional[RedisTokenBucket] = None):
+        # Token bucket per user, split across lock stripes:
+        # {user_id: [tokens, last_refill, capacity]}
+        self.locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self.buckets: List[Dict[str, list]] = [{} for _ in range(LOCK_STRIPES)]
+        # Shared state for multi-process deployments (None = in-process only)
+        self.backend = backend
+        # Ids known to be out of tokens: {id: (retry_at, max_requests, window_seconds)}
+        # Nothing refills a token before retry_at, so repeat requests are
+        # refused from here without taking a lock or calling Redis
+        self.denied: Dict[str, tuple] = {}
+        _start_sweeper(self.locks, self.buckets, self.denied)
     
     def check_rate_limit(self, user_id: str, max_requests: int = 5, window_seconds: int = 60) -> Tuple[bool, str]:
         """
         Check if user has exceeded rate limit
         Returns: (allowed, message)
+        
+        Token bucket holding up to max_requests tokens, refilled at
+        max_requests/window_seconds per second (same as the Redis backend)
         """
-        with self.lock:
+        denied = self.denied.get(user_id)
+        if denied and denied[1:] == (max_requests, window_seconds):
+            wait = denied[0] - time.time()
+            if wait > 0:
+                return self._deny(user_id, max_requests, window_seconds, wait)
+        
+        rate = max_requests / window_seconds
+        
+        result = self.backend.consume(f"rl:user:{user_id}", max_requests, rate) if self.backend else None
+        if result is not None:
+            allowed, tokens = result
+            if allowed:
+                return True, ""
+            return self._deny(user_id, max_requests, window_seconds, (1 - tokens) / rate)
+        
+        lock, buckets = self._stripe(user_id)
+        with lock:
             now = time.time()
-            cutoff = now - window_seconds
-            
-            # Remove old requests outside window
-            self.user_requests[user_id] = [
-                ts for ts in self.user_requests[user_id] if ts > cutoff
-            ]
+            bucket = buckets.get(user_id)
             
-            # Check current count
-            current_count = len(self.user_requests[user_id])
+            if bucket is None:
+                bucket = [float(max_requests), now, max_requests]
+                buckets[user_id] = bucket
+            else:
+                bucket[0] = min(float(max_requests), bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+                bucket[2] = max_requests
             
-            if current_count >= max_requests:
-                oldest = min(self.user_requests[user_id])
-                retry_after = int(window_seconds - (now - oldest)) + 1
-                return False, f"Rate limit exceeded. Maximum {max_requests} requests per {window_seconds}s. Retry after {retry_after}s."
+            if bucket[0] < 1:
+                return self._deny(user_id, max_requests, window_seconds, (1 - bucket[0]) / rate)
             
-            # Add current request
-            self.user_requests[user_id].append(now)
+            bucket[0] -= 1
             return True, ""
     
+    def _deny(self, user_id: str, max_requests: int, window_seconds: int, wait: float) -> Tuple[bool, str]:
+        """Remember that user_id has no tokens for wait seconds and build the refusal"""
+        self.denied[user_id] = (time.time() + wait, max_requests, window_seconds)
+        return False, _user_deny_template(max_requests, window_seconds).format(int(wait) + 1)
+    
+    def _stripe(self, user_id: str) -> Tuple[threading.Lock, Dict[str, list]]:
+        """Lock and bucket map for the stripe owning user_id"""
+        i = hash(user_id) & (LOCK_STRIPES - 1)
+        return self.locks[i], self.buckets[i]
+    
     def get_user_request_count(self, user_id: str, window_seconds: int = 60) -> int:
-        """Get current request count for user in window"""
-        with self.lock:
-            now = time.time()
-            cutoff = now - window_seconds
-            self.user_requests[user_id] = [
-                ts for ts in self.user_requests[user_id] if ts > cutoff
-            ]
-            return len(self.user_requests[user_id])
+        """Get number of requests currently counted against the user (tokens used)"""
+        lock, buckets = self._stripe(user_id)
+        with lock:
+            bucket = buckets.get(user_id)
+            if bucket is None:
+                return 0
+            tokens, last_refill, capacity = bucket
+            tokens = min(float(capacity), tokens + (time.time() - last_refill) * capacity / window_seconds)
+            return math.ceil(capacity - tokens)
 
 
 class EndpointProtection:
-    def __init__(self):
+    def __init__(self, max_tracked: int = 10000, backend: Optional[RedisTokenBucket] = None):
         # General endpoint rate limiting (per IP or global)
-        self.endpoint_requests: Dict[str, list] = defaultdict(list)
-        self.lock = threading.Lock()
+        # Token bucket per identifier: {identifier: [tokens, last_refill]}
+        # Split across lock stripes; least recently seen identifiers are
+        # evicted once a stripe holds its share of max_tracked
+        self.locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self.buckets: "List[OrderedDict[str, list]]" = [OrderedDict() for _ in range(LOCK_STRIPES)]
+        self.max_tracked = max_tracked
+        self.max_per_stripe = max(1, max_tracked // LOCK_STRIPES)
+        # Shared state for multi-process deployments (None = in-process only)
+        self.backend = backend
+        # Ids known to be out of tokens: {id: (retry_at, max_requests, window_seconds)}
+        # Nothing refills a token before retry_at, so repeat requests are
+        # refused from here without taking a lock or calling Redis
+        self.denied: Dict[str, tuple] = {}
+        _start_sweeper(self.locks, self.buckets, self.denied)
     
     def check_endpoint_limit(self, identifier: str, max_requests: int = 100, window_seconds: int = 60) -> Tuple[bool, str]:
         """
         Check endpoint rate limit (for general API protection)
         identifier can be IP address or user_id
+        
+        Token bucket: holds up to max_requests tokens and refills at
+        max_requests/window_seconds per second, so bursts at a window
+        boundary cannot exceed max_requests
         """
-        with self.lock:
+        denied = self.denied.get(identifier)
+        if denied and denied[1:] == (max_requests, window_seconds):
+            wait = denied[0] - time.time()
+            if wait > 0:
+                return self._deny(identifier, max_requests, window_seconds, wait)
+        
+        rate = max_requests / window_seconds
+        
+        result = self.backend.consume(f"rl:endpoint:{identifier}", max_requests, rate) if self.backend else None
+        if result is not None:
+            allowed, tokens = result
+            if allowed:
+                return True, ""
+            return self._deny(identifier, max_requests, window_seconds, (1 - tokens) / rate)
+        
+        i = hash(identifier) & (LOCK_STRIPES - 1)
+        buckets = self.buckets[i]
+        with self.locks[i]:
             now = time.time()
-            cutoff = now - window_seconds
-            
-            self.endpoint_requests[identifier] = [
-                ts for ts in self.endpoint_requests[identifier] if ts > cutoff
-            ]
+            bucket = buckets.get(identifier)
             
-            current_count = len(self.endpoint_requests[identifier])
+            if bucket is None:
+                bucket = [float(max_requests), now]
+                buckets[identifier] = bucket
+                if len(buckets) > self.max_per_stripe:
+                    buckets.popitem(last=False)
+            else:
+                buckets.move_to_end(identifier)
+                bucket[0] = min(float(max_requests), bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
             
-            if current_count >= max_requests:
-                oldest = min(self.endpoint_requests[identifier])
-                retry_after = int(window_seconds - (now - oldest)) + 1
-                return False, f"Too many requests. Maximum {max_requests} per {window_seconds}s. Retry after {retry_after}s."
+            if bucket[0] < 1:
+                return self._deny(identifier, max_requests, window_seconds, (1 - bucket[0]) / rate)
             
-            self.endpoint_requests[identifier].append(now)
+            bucket[0] -= 1
             return True, ""
+    
+    def _deny(self, identifier: str, max_requests: int, window_seconds: int, wait: float) -> Tuple[bool, str]:
+        """Remember that identifier has no tokens for wait seconds and build the refusal"""
+        self.denied[identifier] = (time.time() + wait, max_requests, window_seconds)
+        return False, _endpoint_deny_template(max_requests, window_seconds).format(int(wait) + 1)
 
 
 # Global instances
-rate_limiter = RateLimiter()
-endpoint_protection = EndpointProtection()
+_redis_backend = RedisTokenBucket(config.REDIS_URL) if config.REDIS_URL else None
+rate_limiter = RateLimiter(backend=_redis_backend)
+endpoint_protection = EndpointProtection(backend=_redis_backend)
 
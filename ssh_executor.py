@@ -2,118 +2,76 @@
 SSH Executor - handles remote job execution on GPU nodes
 """
 
-import paramiko
 import time
-import os
-import socket
 import logging
+import posixpath
+import random
+import select
+import shutil
 from typing import Tuple, Optional
 import config
+from ssh_pool import SSHConnection, ssh_pool
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
+# Separate the files read back by get_job_output in a single command
+_OUTPUT_MARKERS = ("<<<JOB_RESULTS>>>", "<<<JOB_STDOUT>>>", "<<<JOB_STDERR>>>")
+
+# Bytes read from a command's output per recv call
+_RECV_SIZE = 1 << 16
+
+
+def _backoff(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """
+    Exponential backoff with equal jitter
+    Spreads out retries from jobs that failed together (e.g. a jump host
+    hiccup) instead of having them collide again, while always waiting at
+    least half the delay so the total retry budget doesn't shrink
+    """
+    delay = min(cap, base * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
 
 class SSHExecutor:
     def __init__(self, node_id: int):
         self.node_id = node_id
-        self.node_ip = config.GPU_NODES[node_id]["ip"]
+        self.conn: Optional[SSHConnection] = None
         self.client = None
         self.jump_client = None
     
     def connect(self) -> bool:
-        """Establish SSH connection to GPU node via jump host"""
+        """Take a pooled SSH connection to GPU node (opened via jump host if none idle)"""
+        # Hand back anything still held, e.g. after a job errored out
+        self.disconnect()
         for attempt in range(config.SSH_RETRY_ATTEMPTS):
             try:
-                return self._connect_via_jump_host()
+                return self._acquire()
             except Exception as e:
                 print(f"SSH connection attempt {attempt + 1} failed for node {self.node_id}: {e}")
                 if attempt < config.SSH_RETRY_ATTEMPTS - 1:
-                    time.sleep(2)
+                    time.sleep(_backoff(attempt, base=2.0))
         return False
     
-    def _connect_via_jump_host(self) -> bool:
-        """Connect to GPU node via SSH jump host"""
-        try:
-            # Connect to jump host first
-            self.jump_client = paramiko.SSHClient()
-            self.jump_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            
-            # Try SSH key first, then fall back to agent
-            jump_key_path = config.JUMP_SSH_KEY or os.path.expanduser("~/.ssh/id_rsa")
-            
-            try:
-                self.jump_client.connect(
-                    hostname=config.JUMP_HOST,
-                    username=config.JUMP_USER,
-                    key_filename=jump_key_path if os.path.exists(jump_key_path) else None,
-                    timeout=config.SSH_TIMEOUT,
-                    banner_timeout=config.SSH_TIMEOUT,
-                    auth_timeout=config.SSH_TIMEOUT,
-                    look_for_keys=True,
-                    allow_agent=True
-                )
-                
-                # ISSUE 1 FIX: Enable SSH keep-alive
-                jump_transport = self.jump_client.get_transport()
-                jump_transport.set_keepalive(60)  # Send keepalive every 60s
-                
-                # TCP keep-alive at OS level
-                try:
-                    sock = jump_transport.sock
-                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
-                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 60)
-                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10)
-                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3)
-                except (OSError, AttributeError) as e:
-                    # Some systems don't support all TCP options
-                    logging.warning(f"Could not set all TCP keepalive options: {e}")
-                
-            except Exception as e:
-                print(f"Jump host connection failed: {e}")
-                return False
-            
-            # Create a channel through jump host to GPU node
-            jump_transport = self.jump_client.get_transport()
-            dest_addr = (self.node_ip, config.SSH_PORT)
-            local_addr = ('127.0.0.1', 0)
-            channel = jump_transport.open_channel("direct-tcpip", dest_addr, local_addr)
-            
-            # Connect to GPU node via the channel
-            self.client = paramiko.SSHClient()
-            self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            self.client.connect(
-                hostname=self.node_ip,
-                port=config.SSH_PORT,
-                username=config.SSH_USERNAME,
-                password=config.SSH_PASSWORD,
-                sock=channel,
-                timeout=config.SSH_TIMEOUT,
-                banner_timeout=config.SSH_TIMEOUT,
-                auth_timeout=config.SSH_TIMEOUT
-            )
-            
-            # ISSUE 1 FIX: Enable keep-alive on GPU node connection too
-            node_transport = self.client.get_transport()
-            node_transport.set_keepalive(60)
-            
-            return True
-            
-        except Exception as e:
-            print(f"Jump host connection failed for node {self.node_id}: {e}")
-            if self.jump_client:
-                self.jump_client.close()
-                self.jump_client = None
+    def _acquire(self) -> bool:
+        """Check out a connection from the pool"""
+        self.conn = ssh_pool.acquire(self.node_id)
+        if self.conn is None:
             return False
+        self.client = self.conn.client
+        self.jump_client = self.conn.jump_client
+        return True
     
-    def disconnect(self):
-        """Close SSH connection"""
-        if self.client:
-            self.client.close()
-            self.client = None
-        if self.jump_client:
-            self.jump_client.close()
-            self.jump_client = None
+    def disconnect(self, discard: bool = False):
+        """
+        Return SSH connection to the pool
+        discard closes it instead, for connections known to be broken
+        """
+        if self.conn:
+            ssh_pool.release(self.conn, discard=discard)
+            self.conn = None
+        self.client = None
+        self.jump_client = None
     
     def check_connection_alive(self) -> bool:
         """
@@ -129,7 +87,12 @@ class SSHExecutor:
             if not transport or not transport.is_active():
                 return False
             
-            # Try lightweight command
+            # An SSH_MSG_IGNORE costs no channel and fails fast on a dead socket
+            transport.send_ignore()
+            if time.monotonic() - self.conn.verified_at < config.SSH_DEEP_CHECK_INTERVAL:
+                return True
+            
+            # Periodically run a real command in case the remote end is wedged
             stdin, stdout, stderr = self.client.exec_command('echo alive', timeout=5)
             result = stdout.read().decode().strip()
             
@@ -138,7 +101,10 @@ class SSHExecutor:
             stdout.close()
             stderr.close()
             
-            return result == 'alive'
+            if result != 'alive':
+                return False
+            self.conn.verified_at = time.monotonic()
+            return True
         except Exception as e:
             logging.warning(f"Connection health check failed: {e}")
             return False
@@ -152,20 +118,44 @@ class SSHExecutor:
             return True
         
         logging.warning(f"Connection lost to node {self.node_id}, reconnecting...")
-        self.disconnect()
+        self.disconnect(discard=True)
         return self.connect()
     
-    def upload_file(self, local_path: str, remote_path: str) -> bool:
-        """Upload file to GPU node"""
+    def upload_file(self, local_path: str, remote_path: str, make_dirs: bool = False) -> bool:
+        """Upload file to GPU node, creating its parent directory first if make_dirs"""
         try:
-            sftp = self.client.open_sftp()
-            sftp.put(local_path, remote_path)
-            sftp.close()
+            sftp = self.conn.sftp()
+            if make_dirs:
+                try:
+                    sftp.mkdir(posixpath.dirname(remote_path))
+                except IOError:
+                    pass  # Already exists
+            # Pipelined writes don't wait for each chunk's ack, and skipping
+            # put()'s confirming stat saves a round-trip (write errors still
+            # surface when the file is closed)
+            with open(local_path, 'rb') as src, sftp.open(remote_path, 'wb') as dst:
+                dst.set_pipelined(True)
+                shutil.copyfileobj(src, dst, 1 << 20)
             return True
         except Exception as e:
             print(f"File upload failed for node {self.node_id}: {e}")
             return False
     
+    def read_file(self, remote_path: str) -> Optional[str]:
+        """
+        Read a text file from GPU node over SFTP
+        Returns: contents ('' if the file doesn't exist), or None if SFTP failed
+        """
+        try:
+            with self.conn.sftp().open(remote_path, 'rb') as f:
+                f.prefetch()  # Request all blocks up front instead of one per round-trip
+                return f.read().decode('utf-8')
+        except FileNotFoundError:
+            return ""
+        except Exception as e:
+            logging.warning(f"SFTP read of {remote_path} failed on node {self.node_id}: {e}")
+            return None
+    
     def execute_command(self, command: str) -> Tuple[int, str, str]:
         """
         Execute command on GPU node
@@ -173,10 +163,29 @@ class SSHExecutor:
         """
         try:
             stdin, stdout, stderr = self.client.exec_command(command)
-            exit_code = stdout.channel.recv_exit_status()
-            stdout_str = stdout.read().decode('utf-8')
-            stderr_str = stderr.read().decode('utf-8')
-            return exit_code, stdout_str, stderr_str
+            
+            # Drain both streams as data arrives: waiting for the exit status
+            # first can stall once output fills the channel window
+            # A dropped transport closes the channel without an EOF (and leaves
+            # it permanently readable), so stop on either
+            channel = stdout.channel
+            out, err = bytearray(), bytearray()
+            deadline = time.monotonic() + config.SSH_COMMAND_TIMEOUT
+            while True:
+                if channel.recv_ready():
+                    out += channel.recv(_RECV_SIZE)
+                elif channel.recv_stderr_ready():
+                    err += channel.recv_stderr(_RECV_SIZE)
+                elif channel.eof_received or channel.closed:
+                    break
+                elif time.monotonic() >= deadline:
+                    channel.close()
+                    return -1, out.decode('utf-8', 'replace'), f"Command timed out after {config.SSH_COMMAND_TIMEOUT}s"
+                else:
+                    select.select([channel], [], [], 1)
+            
+            exit_code = channel.recv_exit_status()
+            return exit_code, out.decode('utf-8', 'replace'), err.decode('utf-8', 'replace')
         except Exception as e:
             return -1, "", str(e)
     
@@ -191,11 +200,8 @@ class SSHExecutor:
         remote_stdout = f"/tmp/job_{job_id}.out"
         remote_stderr = f"/tmp/job_{job_id}.err"
         
-        # Ensure work directory exists
-        self.execute_command("mkdir -p /home/gpuuser/work")
-        
-        # Upload solution file
-        if not self.upload_file(script_path, remote_solution):
+        # Upload solution file (creates the work directory over the same SFTP session)
+        if not self.upload_file(script_path, remote_solution, make_dirs=True):
             return None
         
         # Build grading command
@@ -263,20 +269,28 @@ class SSHExecutor:
                 # Ensure connected
                 if not self.ensure_connected():
                     logging.warning(f"Attempt {attempt+1}/{max_retries}: Reconnecting...")
-                    time.sleep(5 * (attempt + 1))  # Exponential backoff
+                    time.sleep(_backoff(attempt, base=5.0))
                     continue
                 
-                # Read results.jsonl
-                command = f"cat {remote_results} 2>/dev/null || echo ''"
-                _, results, _ = self.execute_command(command)
+                # results.jsonl can be large, so fetch it as a binary SFTP
+                # transfer; cat it with the logs only if SFTP is unavailable
+                sftp_results = self.read_file(remote_results)
+                cat_results = f"cat {remote_results} 2>/dev/null; " if sftp_results is None else ""
                 
-                # Read stdout
-                command = f"cat {remote_stdout} 2>/dev/null || echo ''"
-                _, stdout, _ = self.execute_command(command)
+                # Read stdout and stderr in one round-trip, separated by markers
+                command = (
+                    f"printf '{_OUTPUT_MARKERS[0]}'; {cat_results}"
+                    f"printf '{_OUTPUT_MARKERS[1]}'; cat {remote_stdout} 2>/dev/null; "
+                    f"printf '{_OUTPUT_MARKERS[2]}'; cat {remote_stderr} 2>/dev/null"
+                )
+                _, output, error = self.execute_command(command)
+                if _OUTPUT_MARKERS[2] not in output:
+                    raise RuntimeError(f"Reading job output failed: {error}")
                 
-                # Read stderr
-                command = f"cat {remote_stderr} 2>/dev/null || echo ''"
-                _, stderr, _ = self.execute_command(command)
+                results, rest = output.split(_OUTPUT_MARKERS[0], 1)[1].split(_OUTPUT_MARKERS[1], 1)
+                stdout, stderr = rest.split(_OUTPUT_MARKERS[2], 1)
+                if sftp_results is not None:
+                    results = sftp_results
                 
                 logging.info(f"Successfully retrieved job output for {job_id} on attempt {attempt+1}")
                 return results, stdout, stderr
@@ -284,9 +298,9 @@ class SSHExecutor:
             except Exception as e:
                 logging.error(f"Attempt {attempt+1}/{max_retries} failed: {e}")
                 if attempt < max_retries - 1:
-                    time.sleep(5 * (attempt + 1))
+                    time.sleep(_backoff(attempt, base=5.0))
                     # Try to reconnect
-                    self.disconnect()
+                    self.disconnect(discard=True)
                 else:
                     # Final attempt failed
                     logging.error(f"Failed to retrieve job output after {max_retries} attempts")
@@ -302,8 +316,7 @@ class SSHExecutor:
             f"/tmp/job_{job_id}.out",
             f"/tmp/job_{job_id}.err"
         ]
-        for file in files:
-            self.execute_command(f"rm -f {file}")
+        self.execute_command(f"rm -f {' '.join(files)}")
     
     def restart_node_lxc(self, container_name: str = None) -> bool:
         """
@@ -343,8 +356,9 @@ class SSHExecutor:
                     # Wait for container to be ready (30 seconds)
                     time.sleep(30)
                     
-                    # Reconnect
-                    self.disconnect()
+                    # Reconnect; pooled connections to the old container are dead
+                    self.disconnect(discard=True)
+                    ssh_pool.clear(self.node_id)
                     return self.connect()
                 else:
                     logging.error(f"LXC restart failed: {stderr_text}")
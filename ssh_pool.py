@@ -0,0 +1,243 @@
+"""
+SSH connection pool - reuses GPU node connections between jobs, all
+tunnelled through one shared jump host connection
+"""
+
+import os
+import queue
+import socket
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+import paramiko
+import config
+
+# Flow control for the jump host tunnel and node channels: a 4 MiB window
+# lets uploads keep more data in flight over the extra hop
+SSH_WINDOW_SIZE = 4 * 1024 * 1024
+SSH_MAX_PACKET_SIZE = 512 * 1024
+
+# Resolved once rather than on every connection attempt
+# Jump host auth tries this SSH key first, then falls back to the agent
+_JUMP_KEY_PATH = config.JUMP_SSH_KEY or os.path.expanduser("~/.ssh/id_rsa")
+_JUMP_KEY_FILENAME = _JUMP_KEY_PATH if os.path.exists(_JUMP_KEY_PATH) else None
+_NODE_IPS = [node["ip"] for node in config.GPU_NODES]
+
+
+class SSHConnection:
+    """A GPU node connection and the (shared) jump host connection it tunnels through"""
+
+    def __init__(self, node_id: int, jump_client: paramiko.SSHClient, client: paramiko.SSHClient):
+        self.node_id = node_id
+        self.jump_client = jump_client
+        self.client = client
+        # Last time a command round-tripped successfully (see check_connection_alive)
+        self.verified_at = time.monotonic()
+        self._sftp: Optional[paramiko.SFTPClient] = None
+
+    def is_active(self) -> bool:
+        """Check both transports are still up"""
+        for ssh_client in (self.jump_client, self.client):
+            transport = ssh_client.get_transport()
+            if not transport or not transport.is_active():
+                return False
+        return True
+
+    def sftp(self) -> paramiko.SFTPClient:
+        """SFTP session on the node connection, opened on first use and kept"""
+        if self._sftp is None or self._sftp.get_channel().closed:
+            self._sftp = self.client.open_sftp()
+        return self._sftp
+
+    def close(self):
+        """Close the node connection (the shared jump host connection stays open)"""
+        if self._sftp:
+            self._sftp.close()
+        self.client.close()
+
+
+class SSHConnectionPool:
+    def __init__(self, max_per_node: int = config.SSH_POOL_MAX_PER_NODE):
+        # Idle connections per node, and a semaphore per node bounding how many
+        # connections (idle or in use) exist at once so sshd's MaxStartups
+        # limit is never tripped
+        self.max_per_node = max_per_node
+        self.idle: Dict[int, queue.Queue] = {}
+        self.slots: Dict[int, threading.Semaphore] = {}
+        self.lock = threading.Lock()
+        # One jump host connection shared by all node connections
+        self.jump_client: Optional[paramiko.SSHClient] = None
+        self.jump_lock = threading.Lock()
+
+    def _node(self, node_id: int):
+        """Idle queue and semaphore for a node, created on first use"""
+        with self.lock:
+            if node_id not in self.slots:
+                self.idle[node_id] = queue.Queue()
+                self.slots[node_id] = threading.Semaphore(self.max_per_node)
+            return self.idle[node_id], self.slots[node_id]
+
+    def acquire(self, node_id: int) -> Optional[SSHConnection]:
+        """
+        Take an idle connection to the node, or open a new one
+        Returns: SSHConnection, or None if no slot freed up within SSH_TIMEOUT
+                 or the connection could not be opened
+        """
+        idle, slots = self._node(node_id)
+        if not slots.acquire(timeout=config.SSH_TIMEOUT):
+            print(f"No SSH connection slot free for node {node_id}")
+            return None
+
+        while True:
+            try:
+                conn = idle.get_nowait()
+            except queue.Empty:
+                break
+            if conn.is_active():
+                return conn
+            conn.close()
+
+        conn = self._open(node_id)
+        if conn is None:
+            slots.release()
+        return conn
+
+    def release(self, conn: SSHConnection, discard: bool = False):
+        """Return a connection to the pool (closed instead if discard or dead)"""
+        idle, slots = self._node(conn.node_id)
+        try:
+            if not discard and conn.is_active():
+                idle.put(conn)
+            else:
+                conn.close()
+        finally:
+            slots.release()
+
+    def clear(self, node_id: int):
+        """Close all idle connections to a node (e.g. after it restarts)"""
+        idle, _ = self._node(node_id)
+        while True:
+            try:
+                idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def warm(self, node_ids: Iterable[int]):
+        """Open one idle connection per node, connecting to all nodes concurrently"""
+        def open_one(node_id: int):
+            conn = self.acquire(node_id)
+            if conn:
+                self.release(conn)
+            return conn is not None
+
+        node_ids = list(node_ids)
+        with ThreadPoolExecutor(max_workers=len(node_ids) or 1) as pool:
+            connected = sum(pool.map(open_one, node_ids))
+        print(f"SSH pool warmed: {connected}/{len(node_ids)} nodes connected")
+
+    def _jump(self) -> Optional[paramiko.SSHClient]:
+        """
+        Shared jump host connection, (re)connected on demand
+        Every node connection tunnels through it as its own direct-tcpip
+        channel, so there is one jump host handshake instead of one per node
+        """
+        with self.jump_lock:
+            if self.jump_client:
+                transport = self.jump_client.get_transport()
+                if transport and transport.is_active():
+                    return self.jump_client
+                self.jump_client.close()
+                self.jump_client = None
+
+            jump_client = paramiko.SSHClient()
+            jump_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+
+            try:
+                jump_client.connect(
+                    hostname=config.JUMP_HOST,
+                    username=config.JUMP_USER,
+                    key_filename=_JUMP_KEY_FILENAME,
+                    timeout=config.SSH_TIMEOUT,
+                    banner_timeout=config.SSH_TIMEOUT,
+                    auth_timeout=config.SSH_TIMEOUT,
+                    look_for_keys=True,
+                    allow_agent=True
+                )
+
+                # ISSUE 1 FIX: Enable SSH keep-alive
+                jump_transport = jump_client.get_transport()
+                jump_transport.set_keepalive(60)  # Send keepalive every 60s
+
+                # TCP keep-alive at OS level
+                try:
+                    sock = jump_transport.sock
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 60)
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10)
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3)
+                except (OSError, AttributeError) as e:
+                    # Some systems don't support all TCP options
+                    logging.warning(f"Could not set all TCP keepalive options: {e}")
+
+            except Exception as e:
+                print(f"Jump host connection failed: {e}")
+                jump_client.close()
+                return None
+
+            self.jump_client = jump_client
+            return jump_client
+
+    def _open(self, node_id: int) -> Optional[SSHConnection]:
+        """Connect to GPU node via SSH jump host"""
+        node_ip = _NODE_IPS[node_id]
+        jump_client = self._jump()
+        if jump_client is None:
+            return None
+
+        client = None
+        try:
+            # Create a channel through jump host to GPU node
+            jump_transport = jump_client.get_transport()
+            dest_addr = (node_ip, config.SSH_PORT)
+            local_addr = ('127.0.0.1', 0)
+            channel = jump_transport.open_channel(
+                "direct-tcpip", dest_addr, local_addr,
+                window_size=SSH_WINDOW_SIZE, max_packet_size=SSH_MAX_PACKET_SIZE
+            )
+
+            # Connect to GPU node via the channel
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect(
+                hostname=node_ip,
+                port=config.SSH_PORT,
+                username=config.SSH_USERNAME,
+                password=config.SSH_PASSWORD,
+                sock=channel,
+                compress=config.SSH_COMPRESSION,
+                timeout=config.SSH_TIMEOUT,
+                banner_timeout=config.SSH_TIMEOUT,
+                auth_timeout=config.SSH_TIMEOUT
+            )
+
+            # ISSUE 1 FIX: Enable keep-alive on GPU node connection too
+            node_transport = client.get_transport()
+            node_transport.set_keepalive(60)
+
+            # Larger window/packets for channels opened later (SFTP uploads)
+            node_transport.default_window_size = SSH_WINDOW_SIZE
+            node_transport.default_max_packet_size = SSH_MAX_PACKET_SIZE
+
+            return SSHConnection(node_id, jump_client, client)
+
+        except Exception as e:
+            print(f"Jump host connection failed for node {node_id}: {e}")
+            if client:
+                client.close()
+            return None
+
+
+# Global SSH connection pool
+ssh_pool = SSHConnectionPool()
@@ -2,10 +2,15 @@
 """
 Test script following USER_GUIDE.md exactly
 Tests all features available to regular users
+
+Independent tests run concurrently; each test collects its output and
+the report is printed in test order
 """
 
-import requests
+import asyncio
+import httpx
 import json
+import sys
 import time
 from datetime import datetime
 
@@ -14,378 +19,404 @@ SERVER_URL = "http://localhost:8001"
 TOKEN = "alice_token_demo"
 USER_ID = "alice_user"
 
-print("="*70)
-print("GPU JOB QUEUE SERVER - USER GUIDE FEATURE TEST")
-print("Testing as user:", USER_ID)
-print("="*70)
+# All tests share one keep-alive client (see main)
+HEADERS = {'Authorization': f'Bearer {TOKEN}'}
+
+
+def section(out, title):
+    """Print a test header"""
+    out("\n" + "="*70)
+    out(title)
+    out("="*70)
 
-# Test 1: Submit a Job (should return output automatically)
-print("\n" + "="*70)
-print("TEST 1: SUBMIT JOB (with automatic output return)")
-print("="*70)
 
-print("\n📝 Preparing files...")
+async def test_submit(out, client):
+    """
+    Test 1: Submit a Job (should return output automatically)
+    Returns: job_id, or None if the test failed
+    """
+    section(out, "TEST 1: SUBMIT JOB (with automatic output return)")
 
-# Simple test code
-code = """
+    out("\n📝 Preparing files...")
+
+    # Simple test code
+    code = """
 print('Hello from GPU!')
 import torch
 print(f'CUDA available: {torch.cuda.is_available()}')
 print('Job completed successfully!')
 """
 
-config = {
-    "user_id": USER_ID,
-    "competition_id": "test-demo",
-    "project_id": "user-guide-test",
-    "expected_time": 60,
-    "token": TOKEN
-}
-
-print("Code:")
-print("  - Checks CUDA availability")
-print("  - Prints test messages")
-print("\nConfig:")
-for key, value in config.items():
-    if key != "token":
-        print(f"  - {key}: {value}")
-
-print("\n🚀 Submitting job (waiting for completion)...")
-start_time = time.time()
-
-files = {
-    'code': ('solution.py', code, 'text/x-python'),
-    'config_file': ('config.yaml', json.dumps(config), 'application/json')
-}
-
-headers = {'Authorization': f'Bearer {TOKEN}'}
-
-try:
-    response = requests.post(
-        f"{SERVER_URL}/api/submit",
-        files=files,
-        headers=headers,
-        timeout=120
-    )
-    
-    elapsed = time.time() - start_time
-    
-    if response.status_code == 200:
-        result = response.json()
-        print(f"\n✅ Job submitted and completed in {elapsed:.1f}s")
-        print(f"\nJob ID: {result['job_id']}")
-        print(f"Status: {result['status']}")
-        print(f"Exit Code: {result.get('exit_code', 'N/A')}")
-        
-        if result.get('stdout'):
-            print("\n📄 Results (stdout):")
-            print("-" * 50)
-            print(result['stdout'][:500])  # First 500 chars
-            if len(result['stdout']) > 500:
-                print("... (truncated)")
-        
-        if result.get('stderr'):
-            print("\n⚠️  Errors (stderr):")
-            print(result['stderr'][:200])
-        
-        # Save job_id for later tests
-        job_id = result['job_id']
-        
-        print("\n✅ TEST 1 PASSED: Job submitted and output returned automatically!")
-    else:
-        print(f"\n❌ TEST 1 FAILED: Status {response.status_code}")
-        print(response.text)
-        exit(1)
-        
-except Exception as e:
-    print(f"\n❌ TEST 1 FAILED: {e}")
-    exit(1)
-
-# Wait a moment
-time.sleep(2)
-
-# Test 2: Check Job Status
-print("\n" + "="*70)
-print("TEST 2: CHECK JOB STATUS")
-print("="*70)
+    config = {
+        "user_id": USER_ID,
+        "competition_id": "test-demo",
+        "project_id": "user-guide-test",
+        "expected_time": 60,
+        "token": TOKEN
+    }
+
+    out("Code:")
+    out("  - Checks CUDA availability")
+    out("  - Prints test messages")
+    out("\nConfig:")
+    for key, value in config.items():
+        if key != "token":
+            out(f"  - {key}: {value}")
+
+    out("\n🚀 Submitting job (waiting for completion)...")
+    start_time = time.time()
+
+    files = {
+        'code': ('solution.py', code, 'text/x-python'),
+        'config_file': ('config.yaml', json.dumps(config), 'application/json')
+    }
+
+    try:
+        response = await client.post(
+            "/api/submit",
+            files=files,
+            timeout=120
+        )
 
-print(f"\n🔍 Checking status of job: {job_id}")
-
-try:
-    response = requests.get(
-        f"{SERVER_URL}/api/status/{job_id}?user_id={USER_ID}",
-        headers={'Authorization': f'Bearer {TOKEN}'},
-        timeout=10
-    )
-    
-    if response.status_code == 200:
-        status_data = response.json()
-        print("\n✅ Status retrieved successfully!")
-        print(f"\nJob ID: {status_data['job_id']}")
-        print(f"Status: {status_data['status']}")
-        print(f"Node ID: {status_data.get('node_id', 'N/A')}")
-        print(f"Created: {status_data.get('created_at', 'N/A')}")
-        print(f"Started: {status_data.get('started_at', 'N/A')}")
-        print(f"Completed: {status_data.get('completed_at', 'N/A')}")
-        
-        print("\n✅ TEST 2 PASSED: Job status retrieved!")
-    else:
-        print(f"\n❌ TEST 2 FAILED: Status {response.status_code}")
-        print(response.text)
-        
-except Exception as e:
-    print(f"\n❌ TEST 2 FAILED: {e}")
-
-time.sleep(1)
-
-# Test 3: Get Job Results
-print("\n" + "="*70)
-print("TEST 3: GET JOB RESULTS")
-print("="*70)
+        elapsed = time.time() - start_time
+
+        if response.status_code == 200:
+            result = response.json()
+            out(f"\n✅ Job submitted and completed in {elapsed:.1f}s")
+            out(f"\nJob ID: {result['job_id']}")
+            out(f"Status: {result['status']}")
+            out(f"Exit Code: {result.get('exit_code', 'N/A')}")
+
+            if result.get('stdout'):
+                out("\n📄 Results (stdout):")
+                out("-" * 50)
+                out(result['stdout'][:500])  # First 500 chars
+                if len(result['stdout']) > 500:
+                    out("... (truncated)")
+
+            if result.get('stderr'):
+                out("\n⚠️  Errors (stderr):")
+                out(result['stderr'][:200])
+
+            out("\n✅ TEST 1 PASSED: Job submitted and output returned automatically!")
+            # Save job_id for later tests
+            return result['job_id']
+        else:
+            out(f"\n❌ TEST 1 FAILED: Status {response.status_code}")
+            out(response.text)
 
-print(f"\n📥 Fetching results for job: {job_id}")
-
-try:
-    response = requests.get(
-        f"{SERVER_URL}/api/results/{job_id}?user_id={USER_ID}",
-        headers={'Authorization': f'Bearer {TOKEN}'},
-        timeout=10
-    )
-    
-    if response.status_code == 200:
-        results_data = response.json()
-        print("\n✅ Results retrieved successfully!")
-        print(f"\nJob ID: {results_data['job_id']}")
-        print(f"Status: {results_data['status']}")
-        
-        if results_data.get('stdout'):
-            print("\n📄 Results (stdout):")
-            print("-" * 50)
-            print(results_data['stdout'][:300])
-            if len(results_data['stdout']) > 300:
-                print("... (truncated)")
-        
-        print("\n✅ TEST 3 PASSED: Job results retrieved!")
-    else:
-        print(f"\n❌ TEST 3 FAILED: Status {response.status_code}")
-        print(response.text)
-        
-except Exception as e:
-    print(f"\n❌ TEST 3 FAILED: {e}")
-
-time.sleep(1)
-
-# Test 4: List Your Jobs
-print("\n" + "="*70)
-print("TEST 4: LIST YOUR JOBS")
-print("="*70)
+    except Exception as e:
+        out(f"\n❌ TEST 1 FAILED: {e}")
+    return None
 
-print(f"\n📋 Listing all jobs for user: {USER_ID}")
-
-try:
-    response = requests.get(
-        f"{SERVER_URL}/api/jobs?user_id={USER_ID}",
-        headers={'Authorization': f'Bearer {TOKEN}'},
-        timeout=10
-    )
-    
-    if response.status_code == 200:
-        jobs = response.json()
-        print(f"\n✅ Found {len(jobs)} job(s)!")
-        
-        # Show first 5 jobs
-        for i, job in enumerate(jobs, 1):
-            if i > 5:
-                break
-            print(f"\n{i}. Job {job['job_id'][:8]}...")
-            print(f"   Status: {job['status']}")
-            print(f"   Competition: {job.get('competition_id', 'N/A')}")
-            print(f"   Created: {job.get('created_at', 'N/A')}")
-        
-        if len(jobs) > 5:
-            print(f"\n   ... and {len(jobs) - 5} more")
-        
-        print("\n✅ TEST 4 PASSED: Job list retrieved!")
-    else:
-        print(f"\n❌ TEST 4 FAILED: Status {response.status_code}")
-        print(response.text)
-        
-except Exception as e:
-    print(f"\n❌ TEST 4 FAILED: {e}")
-
-time.sleep(1)
-
-# Test 5: Submit a Long-Running Job (for cancellation test)
-print("\n" + "="*70)
-print("TEST 5: CANCEL A JOB")
-print("="*70)
 
-print("\n📝 Submitting a long-running job to cancel...")
+async def test_status(out, client, job_id):
+    """Test 2: Check Job Status"""
+    section(out, "TEST 2: CHECK JOB STATUS")
+
+    out(f"\n🔍 Checking status of job: {job_id}")
+
+    try:
+        response = await client.get(
+            f"/api/status/{job_id}?user_id={USER_ID}",
+            timeout=10
+        )
+
+        if response.status_code == 200:
+            status_data = response.json()
+            out("\n✅ Status retrieved successfully!")
+            out(f"\nJob ID: {status_data['job_id']}")
+            out(f"Status: {status_data['status']}")
+            out(f"Node ID: {status_data.get('node_id', 'N/A')}")
+            out(f"Created: {status_data.get('created_at', 'N/A')}")
+            out(f"Started: {status_data.get('started_at', 'N/A')}")
+            out(f"Completed: {status_data.get('completed_at', 'N/A')}")
+
+            out("\n✅ TEST 2 PASSED: Job status retrieved!")
+        else:
+            out(f"\n❌ TEST 2 FAILED: Status {response.status_code}")
+            out(response.text)
+
+    except Exception as e:
+        out(f"\n❌ TEST 2 FAILED: {e}")
+
+
+async def test_results(out, client, job_id):
+    """Test 3: Get Job Results"""
+    section(out, "TEST 3: GET JOB RESULTS")
+
+    out(f"\n📥 Fetching results for job: {job_id}")
+
+    try:
+        response = await client.get(
+            f"/api/results/{job_id}?user_id={USER_ID}",
+            timeout=10
+        )
+
+        if response.status_code == 200:
+            results_data = response.json()
+            out("\n✅ Results retrieved successfully!")
+            out(f"\nJob ID: {results_data['job_id']}")
+            out(f"Status: {results_data['status']}")
+
+            if results_data.get('stdout'):
+                out("\n📄 Results (stdout):")
+                out("-" * 50)
+                out(results_data['stdout'][:300])
+                if len(results_data['stdout']) > 300:
+                    out("... (truncated)")
+
+            out("\n✅ TEST 3 PASSED: Job results retrieved!")
+        else:
+            out(f"\n❌ TEST 3 FAILED: Status {response.status_code}")
+            out(response.text)
+
+    except Exception as e:
+        out(f"\n❌ TEST 3 FAILED: {e}")
+
+
+async def test_list_jobs(out, client):
+    """Test 4: List Your Jobs"""
+    section(out, "TEST 4: LIST YOUR JOBS")
+
+    out(f"\n📋 Listing all jobs for user: {USER_ID}")
+
+    try:
+        response = await client.get(
+            f"/api/jobs?user_id={USER_ID}",
+            timeout=10
+        )
 
-long_code = """
+        if response.status_code == 200:
+            jobs = response.json()
+            out(f"\n✅ Found {len(jobs)} job(s)!")
+
+            # Show first 5 jobs
+            for i, job in enumerate(jobs, 1):
+                if i > 5:
+                    break
+                out(f"\n{i}. Job {job['job_id'][:8]}...")
+                out(f"   Status: {job['status']}")
+                out(f"   Competition: {job.get('competition_id', 'N/A')}")
+                out(f"   Created: {job.get('created_at', 'N/A')}")
+
+            if len(jobs) > 5:
+                out(f"\n   ... and {len(jobs) - 5} more")
+
+            out("\n✅ TEST 4 PASSED: Job list retrieved!")
+        else:
+            out(f"\n❌ TEST 4 FAILED: Status {response.status_code}")
+            out(response.text)
+
+    except Exception as e:
+        out(f"\n❌ TEST 4 FAILED: {e}")
+
+
+async def test_cancel(out, client):
+    """Test 5: Submit a Long-Running Job (for cancellation test)"""
+    section(out, "TEST 5: CANCEL A JOB")
+
+    out("\n📝 Submitting a long-running job to cancel...")
+
+    long_code = """
 import time
 for i in range(100):
     print(f'Step {i}')
     time.sleep(1)
 """
 
-long_config = {
-    "user_id": USER_ID,
-    "competition_id": "cancel-test",
-    "project_id": "user-guide-test",
-    "expected_time": 120,
-    "token": TOKEN
-}
-
-files = {
-    'code': ('solution.py', long_code, 'text/x-python'),
-    'config_file': ('config.yaml', json.dumps(long_config), 'application/json')
-}
-
-try:
-    # Submit job (don't wait for completion)
-    print("🚀 Submitting long job...")
-    response = requests.post(
-        f"{SERVER_URL}/api/submit",
-        files=files,
-        headers=headers,
-        timeout=10
-    )
-    
-    if response.status_code == 200:
-        long_job_data = response.json()
-        long_job_id = long_job_data['job_id']
-        print(f"✅ Job submitted: {long_job_id}")
-        
-        # Wait a moment for job to start
-        print("⏳ Waiting 2 seconds...")
-        time.sleep(2)
-        
-        # Try to cancel it
-        print(f"\n🛑 Attempting to cancel job: {long_job_id}")
-        
-        cancel_response = requests.post(
-            f"{SERVER_URL}/api/cancel/{long_job_id}?user_id={USER_ID}",
-            headers={'Authorization': f'Bearer {TOKEN}'},
+    long_config = {
+        "user_id": USER_ID,
+        "competition_id": "cancel-test",
+        "project_id": "user-guide-test",
+        "expected_time": 120,
+        "token": TOKEN
+    }
+
+    files = {
+        'code': ('solution.py', long_code, 'text/x-python'),
+        'config_file': ('config.yaml', json.dumps(long_config), 'application/json')
+    }
+
+    try:
+        # Submit job (don't wait for completion)
+        out("🚀 Submitting long job...")
+        response = await client.post(
+            "/api/submit",
+            files=files,
             timeout=10
         )
-        
-        if cancel_response.status_code == 200:
-            print("\n✅ Job cancelled successfully!")
-            
-            # Verify cancellation
-            time.sleep(1)
-            status_response = requests.get(
-                f"{SERVER_URL}/api/status/{long_job_id}?user_id={USER_ID}",
-                headers={'Authorization': f'Bearer {TOKEN}'},
+
+        if response.status_code == 200:
+            long_job_data = response.json()
+            long_job_id = long_job_data['job_id']
+            out(f"✅ Job submitted: {long_job_id}")
+
+            # Wait a moment for job to start
+            out("⏳ Waiting 2 seconds...")
+            await asyncio.sleep(2)
+
+            # Try to cancel it
+            out(f"\n🛑 Attempting to cancel job: {long_job_id}")
+
+            cancel_response = await client.post(
+                f"/api/cancel/{long_job_id}?user_id={USER_ID}",
                 timeout=10
             )
-            
-            if status_response.status_code == 200:
-                final_status = status_response.json()
-                print(f"Final status: {final_status['status']}")
-                
-                if final_status['status'] == 'cancelled':
-                    print("\n✅ TEST 5 PASSED: Job successfully cancelled!")
-                else:
-                    print(f"\n⚠️  TEST 5 PARTIAL: Job status is {final_status['status']} (may have completed before cancel)")
+
+            if cancel_response.status_code == 200:
+                out("\n✅ Job cancelled successfully!")
+
+                # Verify cancellation
+                await asyncio.sleep(1)
+                status_response = await client.get(
+                    f"/api/status/{long_job_id}?user_id={USER_ID}",
+                    timeout=10
+                )
+
+                if status_response.status_code == 200:
+                    final_status = status_response.json()
+                    out(f"Final status: {final_status['status']}")
+
+                    if final_status['status'] == 'cancelled':
+                        out("\n✅ TEST 5 PASSED: Job successfully cancelled!")
+                    else:
+                        out(f"\n⚠️  TEST 5 PARTIAL: Job status is {final_status['status']} (may have completed before cancel)")
+            else:
+                out(f"\n❌ Cancel failed: Status {cancel_response.status_code}")
+                out(cancel_response.text)
         else:
-            print(f"\n❌ Cancel failed: Status {cancel_response.status_code}")
-            print(cancel_response.text)
-    else:
-        print(f"\n❌ Job submission failed: Status {response.status_code}")
-        
-except requests.exceptions.Timeout:
-    print("\n⚠️  TEST 5 NOTE: Job submission timed out (expected for long job)")
-    print("This is OK - the job is running in background")
-except Exception as e:
-    print(f"\n❌ TEST 5 ERROR: {e}")
-
-# Test 6: Python Example from USER_GUIDE
-print("\n" + "="*70)
-print("TEST 6: PYTHON EXAMPLE FROM USER_GUIDE")
-print("="*70)
+            out(f"\n❌ Job submission failed: Status {response.status_code}")
+
+    except httpx.TimeoutException:
+        out("\n⚠️  TEST 5 NOTE: Job submission timed out (expected for long job)")
+        out("This is OK - the job is running in background")
+    except Exception as e:
+        out(f"\n❌ TEST 5 ERROR: {e}")
 
-print("\n🐍 Testing the exact Python example from USER_GUIDE.md...")
 
-# Exact example from USER_GUIDE
-example_code = """
+async def test_python_example(out, client):
+    """Test 6: Python Example from USER_GUIDE"""
+    section(out, "TEST 6: PYTHON EXAMPLE FROM USER_GUIDE")
+
+    out("\n🐍 Testing the exact Python example from USER_GUIDE.md...")
+
+    # Exact example from USER_GUIDE
+    example_code = """
 print('Hello from GPU!')
 import torch
 print(f'CUDA available: {torch.cuda.is_available()}')
 """
 
-example_config = {
-    "user_id": USER_ID,
-    "competition_id": "test",
-    "project_id": "demo",
-    "expected_time": 60,
-    "token": TOKEN
-}
-
-files = {
-    'code': ('solution.py', example_code, 'text/x-python'),
-    'config_file': ('config.yaml', json.dumps(example_config), 'application/json')
-}
-
-try:
-    response = requests.post(
-        f"{SERVER_URL}/api/submit",
-        files=files,
-        headers=headers,
-        timeout=120
-    )
-    
-    if response.status_code == 200:
-        result = response.json()
-        print(f"\n✅ Example code executed successfully!")
-        print(f"Job ID: {result['job_id']}")
-        print(f"Status: {result['status']}")
-        print(f"\nResults: {result['stdout'][:200]}")
-        
-        print("\n✅ TEST 6 PASSED: USER_GUIDE Python example works!")
-    else:
-        print(f"\n❌ TEST 6 FAILED: Status {response.status_code}")
-        
-except Exception as e:
-    print(f"\n❌ TEST 6 FAILED: {e}")
-
-# Test 7: Verify User Can't See Other Users' Jobs
-print("\n" + "="*70)
-print("TEST 7: PRIVACY - USER ISOLATION")
-print("="*70)
+    example_config = {
+        "user_id": USER_ID,
+        "competition_id": "test",
+        "project_id": "demo",
+        "expected_time": 60,
+        "token": TOKEN
+    }
+
+    files = {
+        'code': ('solution.py', example_code, 'text/x-python'),
+        'config_file': ('config.yaml', json.dumps(example_config), 'application/json')
+    }
+
+    try:
+        response = await client.post(
+            "/api/submit",
+            files=files,
+            timeout=120
+        )
 
-print("\n🔒 Verifying user can only see own jobs...")
-
-try:
-    # Try to access the original job_id (which belongs to alice_user)
-    # Using correct token, should work
-    response = requests.get(
-        f"{SERVER_URL}/api/status/{job_id}?user_id={USER_ID}",
-        headers={'Authorization': f'Bearer {TOKEN}'},
-        timeout=10
-    )
-    
-    if response.status_code == 200:
-        print("✅ Can access own job")
-        
-        # Try to use a different user_id with same token (should fail)
-        wrong_response = requests.get(
-            f"{SERVER_URL}/api/status/{job_id}?user_id=different_user",
-            headers={'Authorization': f'Bearer {TOKEN}'},
+        if response.status_code == 200:
+            result = response.json()
+            out(f"\n✅ Example code executed successfully!")
+            out(f"Job ID: {result['job_id']}")
+            out(f"Status: {result['status']}")
+            out(f"\nResults: {result['stdout'][:200]}")
+
+            out("\n✅ TEST 6 PASSED: USER_GUIDE Python example works!")
+        else:
+            out(f"\n❌ TEST 6 FAILED: Status {response.status_code}")
+
+    except Exception as e:
+        out(f"\n❌ TEST 6 FAILED: {e}")
+
+
+async def test_isolation(out, client, job_id):
+    """Test 7: Verify User Can't See Other Users' Jobs"""
+    section(out, "TEST 7: PRIVACY - USER ISOLATION")
+
+    out("\n🔒 Verifying user can only see own jobs...")
+
+    try:
+        # Try to access the original job_id (which belongs to alice_user)
+        # Using correct token, should work
+        response = await client.get(
+            f"/api/status/{job_id}?user_id={USER_ID}",
             timeout=10
         )
-        
-        if wrong_response.status_code == 403:
-            print("✅ Cannot access jobs with mismatched user_id")
-            print("\n✅ TEST 7 PASSED: User isolation verified!")
+
+        if response.status_code == 200:
+            out("✅ Can access own job")
+
+            # Try to use a different user_id with same token (should fail)
+            wrong_response = await client.get(
+                f"/api/status/{job_id}?user_id=different_user",
+                timeout=10
+            )
+
+            if wrong_response.status_code == 403:
+                out("✅ Cannot access jobs with mismatched user_id")
+                out("\n✅ TEST 7 PASSED: User isolation verified!")
+            else:
+                out(f"⚠️  Expected 403, got {wrong_response.status_code}")
         else:
-            print(f"⚠️  Expected 403, got {wrong_response.status_code}")
-    else:
-        print(f"❌ Cannot access own job: {response.status_code}")
-        
-except Exception as e:
-    print(f"❌ TEST 7 ERROR: {e}")
+            out(f"❌ Cannot access own job: {response.status_code}")
+
+    except Exception as e:
+        out(f"❌ TEST 7 ERROR: {e}")
+
+
+async def run(test, *args):
+    """Run a test, collecting its output instead of printing it"""
+    lines = []
+    result = await test(lines.append, *args)
+    return result, lines
+
+
+async def main():
+    """Run the tests, printing each one's output in test order"""
+    async with httpx.AsyncClient(base_url=SERVER_URL, headers=HEADERS) as client:
+        # Tests 1, 5 and 6 are separate submissions
+        submit_task = asyncio.create_task(run(test_submit, client))
+        cancel_task = asyncio.create_task(run(test_cancel, client))
+        example_task = asyncio.create_task(run(test_python_example, client))
+
+        job_id, lines = await submit_task
+        print("\n".join(lines))
+        if job_id is None:
+            sys.exit(1)
+
+        # Tests 2, 3, 4 and 7 only read the job from test 1
+        results = await asyncio.gather(
+            run(test_status, client, job_id),
+            run(test_results, client, job_id),
+            run(test_list_jobs, client),
+            cancel_task,
+            example_task,
+            run(test_isolation, client, job_id),
+        )
+        for _, lines in results:
+            print("\n".join(lines))
+
+
+print("="*70)
+print("GPU JOB QUEUE SERVER - USER GUIDE FEATURE TEST")
+print("Testing as user:", USER_ID)
+print("="*70)
+
+asyncio.run(main())
 
 # Final Summary
 print("\n" + "="*70)
@@ -415,4 +446,3 @@ Ready for production use! 🚀
 
 print(summary)
 print("="*70)
-
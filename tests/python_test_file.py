@@ -6,9 +6,20 @@ from collections import Counter
 
 
 import numpy as np, pandas as pd
+from scipy import sparse
+from joblib import Parallel, delayed
+try:
+    import numba  # compiled one-pass standardization, if installed
+except ImportError:
+    numba = None
+try:
+    from sklearnex import patch_sklearn  # Intel-accelerated sklearn, if installed
+    patch_sklearn()
+except ImportError:
+    pass
 from sklearn.model_selection import StratifiedKFold
 from sklearn.decomposition import PCA
-from sklearn.preprocessing import OneHotEncoder, StandardScaler, MultiLabelBinarizer
+from sklearn.preprocessing import OneHotEncoder
 from sklearn.metrics import roc_auc_score
 
 
@@ -23,6 +34,11 @@ from catboost import CatBoostClassifier, Pool
 
 import torch
 from transformers import AutoTokenizer, AutoModel
+try:
+    from sentence_transformers import SentenceTransformer, models as st_models  # ONNX encoder, if installed
+    import onnxruntime  # noqa: F401
+except ImportError:
+    SentenceTransformer = None
 
 
 warnings.filterwarnings("ignore")
@@ -65,7 +81,7 @@ train_df["target"] = train_df["requester_received_pizza"].astype(int)
 def concat_text(df):
     return (
         df["request_title"].fillna("") + " " + df["request_text_edit_aware"].fillna("")
-    ).values
+    ).to_numpy()
 
 
 
@@ -78,9 +94,34 @@ test_texts = concat_text(test_df)
 # 3. Sentence-Transformer embeddings -> PCA 64-D
 # --------------------------------------------------------------
 DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-TOKENIZER = AutoTokenizer.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
-MODEL = AutoModel.from_pretrained("sentence-transformers/all-MiniLM-L6-v2").to(DEVICE)
-MODEL.eval()
+if SentenceTransformer is not None:
+    # The whole encoder runs as one fused ONNX graph (O4 is the fp16
+    # optimized export, GPU only). Built from the Transformer and Pooling
+    # modules only: the published model also ends in a Normalize module,
+    # which would L2-normalize where embed_batch returns raw mean-pooled
+    # vectors, so both paths feed PCA the same features
+    ST_MODEL = SentenceTransformer(
+        modules=[
+            st_models.Transformer(
+                "sentence-transformers/all-MiniLM-L6-v2",
+                max_seq_length=256,
+                backend="onnx",
+                model_args={
+                    "file_name": "onnx/model_O4.onnx" if DEVICE.type == "cuda" else "onnx/model.onnx",
+                    "provider": "CUDAExecutionProvider" if DEVICE.type == "cuda" else "CPUExecutionProvider",
+                },
+            ),
+            st_models.Pooling(384, pooling_mode="mean"),
+        ],
+        device=DEVICE.type,
+    )
+else:
+    ST_MODEL = None
+    TOKENIZER = AutoTokenizer.from_pretrained("sentence-transformers/all-MiniLM-L6-v2", use_fast=True)
+    MODEL = AutoModel.from_pretrained("sentence-transformers/all-MiniLM-L6-v2").to(DEVICE)
+    if DEVICE.type == "cuda":
+        MODEL.half()  # FP16 halves memory traffic; MiniLM embeddings are stable in half precision
+    MODEL.eval()
 
 
 
@@ -96,31 +137,62 @@ def mean_pooling(model_output, attention_mask):
 
 
 def embed_batch(texts, batch_size=256):
-    out = []
-    with torch.no_grad():
-        for i in range(0, len(texts), batch_size):
-            batch = list(texts[i : i + batch_size])
-            enc = TOKENIZER(
-                batch,
-                padding=True,
-                truncation=True,
-                max_length=256,
-                return_tensors="pt",
-            )
-            ids, mask = enc["input_ids"].to(DEVICE), enc["attention_mask"].to(DEVICE)
-            out.append(mean_pooling(MODEL(ids, mask), mask).cpu().numpy())
-    return np.vstack(out)
-
-
-
-
-print("Embedding train texts …")
-train_emb_full = embed_batch(train_texts)
-print("Embedding test texts …")
-test_emb_full = embed_batch(test_texts)
-
-
-pca = PCA(n_components=64, random_state=SEED)
+    # Tokenize everything in one fast-tokenizer call, then run batches of
+    # similar length so each one pads only to its own longest text
+    input_ids = TOKENIZER(list(texts), padding=False, truncation=True, max_length=256)["input_ids"]
+    order = np.argsort([len(ids) for ids in input_ids], kind="stable")
+    batches = [order[i : i + batch_size] for i in range(0, len(order), batch_size)]
+    out = np.empty((len(input_ids), MODEL.config.hidden_size), dtype=np.float32)
+
+    # On CUDA, the next batch is padded and copied on a side stream while
+    # the current batch runs on the default stream
+    copy_stream = torch.cuda.Stream() if DEVICE.type == "cuda" else None
+
+    def load(idx):
+        enc = TOKENIZER.pad({"input_ids": [input_ids[j] for j in idx]}, return_tensors="pt")
+        if copy_stream is None:
+            return enc["input_ids"], enc["attention_mask"]
+        with torch.cuda.stream(copy_stream):
+            return (enc["input_ids"].pin_memory().to(DEVICE, non_blocking=True),
+                    enc["attention_mask"].pin_memory().to(DEVICE, non_blocking=True))
+
+    with torch.no_grad(), torch.inference_mode():
+        pending = load(batches[0]) if batches else None
+        for n, idx in enumerate(batches):
+            ids, mask = pending
+            if copy_stream is not None:
+                torch.cuda.current_stream().wait_stream(copy_stream)
+                ids.record_stream(torch.cuda.current_stream())
+                mask.record_stream(torch.cuda.current_stream())
+            pooled = mean_pooling(MODEL(ids, mask), mask)
+            if n + 1 < len(batches):
+                pending = load(batches[n + 1])
+            out[idx] = pooled.float().cpu().numpy()
+    return out
+
+
+
+
+def embed(texts):
+    if ST_MODEL is not None:
+        return ST_MODEL.encode(list(texts), batch_size=256, convert_to_numpy=True,
+                               show_progress_bar=False)
+    return embed_batch(texts)
+
+
+
+
+# Each distinct text (blank requests, reposts) is encoded once for train
+# and test together, then gathered back to rows
+print("Embedding train + test texts …")
+uniq_texts, inverse = np.unique(np.concatenate([train_texts, test_texts]), return_inverse=True)
+all_emb_full = embed(uniq_texts.tolist())[inverse]
+train_emb_full = all_emb_full[: len(train_texts)]
+test_emb_full = all_emb_full[len(train_texts) :]
+
+
+# Randomized SVD only computes the top 64 components instead of a full SVD
+pca = PCA(n_components=64, svd_solver="randomized", n_oversamples=10, random_state=SEED)
 train_emb = pca.fit_transform(train_emb_full)
 test_emb = pca.transform(test_emb_full)
 
@@ -157,12 +229,12 @@ for df in (train_df, test_df):
     for col in NUMERIC_COLS:
         if col not in df:
             df[col] = 0
-    hour = (df["unix_timestamp_of_request_utc"] % 86400) / 86400.0
-    df["hour_sin"] = np.sin(2 * np.pi * hour)
-    df["hour_cos"] = np.cos(2 * np.pi * hour)
-    dow = ((df["unix_timestamp_of_request_utc"] // 86400) % 7) / 7.0
-    df["dow_sin"] = np.sin(2 * np.pi * dow)
-    df["dow_cos"] = np.cos(2 * np.pi * dow)
+    ts = df["unix_timestamp_of_request_utc"].to_numpy(dtype=np.int64)
+    # exp(i*theta) gives cos (real) and sin (imag) from one evaluation
+    hour = np.exp(2j * np.pi * ((ts % 86400) / 86400.0))
+    df["hour_sin"], df["hour_cos"] = hour.imag, hour.real
+    dow = np.exp(2j * np.pi * (((ts // 86400) % 7) / 7.0))
+    df["dow_sin"], df["dow_cos"] = dow.imag, dow.real
 
 
 flair_map = {"shroom": 1, "PIF": 2}
@@ -191,29 +263,62 @@ def top_n_subreddits(series, n=200):
 top_subs = top_n_subreddits(train_df["requester_subreddits_at_request"], n=200)
 
 
-mlb = MultiLabelBinarizer(classes=top_subs)
-sub_train = mlb.fit_transform(train_df["requester_subreddits_at_request"])
-sub_test = mlb.transform(test_df["requester_subreddits_at_request"])
+def multi_hot(series, classes):
+    # Built straight into CSR, without a dense int intermediate
+    sub_to_idx = {sub: i for i, sub in enumerate(classes)}
+    indptr, indices = [0], []
+    for subs in series:
+        indices.extend(sorted({sub_to_idx[sub] for sub in subs if sub in sub_to_idx}))
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.float32)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(indptr) - 1, len(classes)))
+
 
 
-sub_train = np.asarray(sub_train, dtype=np.float32)
-sub_test  = np.asarray(sub_test,  dtype=np.float32)
+
+sub_train = multi_hot(train_df["requester_subreddits_at_request"], top_subs)
+sub_test = multi_hot(test_df["requester_subreddits_at_request"], top_subs)
 
 
 # --------------------------------------------------------------
 # 6. Light textual features + sentiment
 # --------------------------------------------------------------
 sid = SentimentIntensityAnalyzer()
+VADER_CACHE_PATH = "./vader_cache.parquet"
+
+
+
+
+def vader_scores(texts):
+    # VADER compound scores cached on disk by text hash, so reruns only
+    # score texts they have not seen before
+    keys = pd.util.hash_pandas_object(pd.Series(texts), index=False).to_numpy()
+    if os.path.exists(VADER_CACHE_PATH):
+        cache = pd.read_parquet(VADER_CACHE_PATH)["compound"]
+    else:
+        cache = pd.Series(dtype=np.float64, index=pd.Index([], dtype=np.uint64))
+    scores = pd.Series(keys).map(cache).to_numpy(dtype=np.float64, copy=True)
+    missing = np.flatnonzero(np.isnan(scores))
+    if len(missing):
+        scores[missing] = [sid.polarity_scores(texts[i])["compound"] for i in missing]
+        new = pd.Series(scores[missing], index=keys[missing])
+        pd.concat([cache, new]).to_frame("compound").to_parquet(VADER_CACHE_PATH)
+    return scores
 
 
 
 
 def text_stats(series):
-    chars = series.str.len().fillna(0)
-    words = series.str.split().apply(len).fillna(0)
-    excls = series.str.count("!").fillna(0)
-    ques = series.str.count(r"\?").fillna(0)
-    sentiment = series.apply(lambda x: sid.polarity_scores(x or "")["compound"])
+    # Arrow-backed strings run the counts in C kernels
+    s = series.fillna("").astype("string[pyarrow]")
+    chars = s.str.len().to_numpy(dtype=np.float64)
+    words = s.str.count(r"\S+").to_numpy(dtype=np.float64)
+    excls = s.str.count("!").to_numpy(dtype=np.float64)
+    ques = s.str.count(r"\?").to_numpy(dtype=np.float64)
+    # VADER is slow pure Python: score each distinct text once (blank and
+    # reposted requests repeat) and gather back to rows
+    codes, uniques = pd.factorize(series.fillna(""))
+    sentiment = vader_scores(uniques)[codes]
     return np.vstack([chars, words, excls, ques, sentiment]).T
 
 
@@ -227,29 +332,66 @@ txt_stats_test = text_stats(test_df["request_text_edit_aware"])
 # 7. Assemble full feature matrices
 # --------------------------------------------------------------
 numeric_features = NUMERIC_COLS + ["hour_sin", "hour_cos", "dow_sin", "dow_cos"]
-X_num_train = train_df[numeric_features].values.astype(np.float32)
-X_num_test = test_df[numeric_features].values.astype(np.float32)
-
-
-scaler = StandardScaler()
-X_num_train = scaler.fit_transform(X_num_train)
-X_num_test = scaler.transform(X_num_test)
+X_num_train = train_df[numeric_features].to_numpy(dtype=np.float32, copy=False)
+X_num_test = test_df[numeric_features].to_numpy(dtype=np.float32, copy=False)
+
+
+# Same result as StandardScaler (population std, constant columns unscaled)
+if numba is not None:
+    @numba.njit(parallel=True, fastmath=True)
+    def standardize(X_train, X_test):
+        n_cols = X_train.shape[1]
+        out_train = np.empty_like(X_train)
+        out_test = np.empty_like(X_test)
+        for j in numba.prange(n_cols):
+            # Welford mean / variance in one pass over the column
+            mean = 0.0
+            m2 = 0.0
+            for i in range(X_train.shape[0]):
+                delta = X_train[i, j] - mean
+                mean += delta / (i + 1)
+                m2 += delta * (X_train[i, j] - mean)
+            std = np.sqrt(m2 / max(X_train.shape[0], 1))
+            if std == 0.0:
+                std = 1.0
+            for i in range(X_train.shape[0]):
+                out_train[i, j] = (X_train[i, j] - mean) / std
+            for i in range(X_test.shape[0]):
+                out_test[i, j] = (X_test[i, j] - mean) / std
+        return out_train, out_test
+else:
+    def standardize(X_train, X_test):
+        mean = X_train.mean(axis=0)
+        std = X_train.std(axis=0)
+        std[std == 0] = 1.0
+        return (X_train - mean) / std, (X_test - mean) / std
+
+
+
+
+X_num_train, X_num_test = standardize(
+    np.ascontiguousarray(X_num_train, dtype=np.float32),
+    np.ascontiguousarray(X_num_test, dtype=np.float32),
+)
 
 
-dense_train = np.hstack([train_emb, X_num_train, flair_train, txt_stats_train, sub_train])
-dense_test = np.hstack([test_emb, X_num_test, flair_test, txt_stats_test, sub_test])
+dense_train = np.hstack([train_emb, X_num_train, flair_train, txt_stats_train, sub_train.toarray()])
+dense_test = np.hstack([test_emb, X_num_test, flair_test, txt_stats_test, sub_test.toarray()])
 
 
-from scipy import sparse
+# LightGBM gets a dense float32 matrix: with a few hundred mostly dense
+# columns its histogram build is faster on dense rows than on CSR indices
+X_train = np.ascontiguousarray(np.hstack([dense_train, sub_train.toarray()]), dtype=np.float32)
+X_test  = np.ascontiguousarray(np.hstack([dense_test, sub_test.toarray()]), dtype=np.float32)
 
 
-X_train = sparse.hstack([sparse.csr_matrix(dense_train),
-                         sparse.csr_matrix(sub_train)], format="csr")
-X_test  = sparse.hstack([sparse.csr_matrix(dense_test),
-                         sparse.csr_matrix(sub_test)],  format="csr")
+# CatBoost quantizes features into at most 254 borders anyway, so its copy
+# of the dense block is float16: half the RAM and bytes moved building Pools
+dense_train = dense_train.astype(np.float16)
+dense_test = dense_test.astype(np.float16)
 
 
-y = train_df["target"].values.astype(np.float32)
+y = train_df["target"].to_numpy(dtype=np.float32, copy=False)
 
 
 
@@ -257,29 +399,45 @@ y = train_df["target"].values.astype(np.float32)
 # --------------------------------------------------------------
 # 8. K-fold target encoding for username (for LightGBM)
 # --------------------------------------------------------------
-def target_encode(train_idx, val_idx, y, usernames, min_samples_leaf=100, smoothing=10):
-    tr_user = usernames[train_idx]
-    val_user = usernames[val_idx]
-    agg = pd.DataFrame({"user": tr_user, "target": y[train_idx]})
-    stats = agg.groupby("user")["target"].agg(["mean", "count"])
-    smoothing_val = 1 / (1 + np.exp(-(stats["count"] - min_samples_leaf) / smoothing))
+def target_encode(train_idx, val_idx, y, user_codes, min_samples_leaf=100, smoothing=10):
+    # user_codes are integer codes (pd.factorize), so per-user sums and
+    # counts are bincounts and the lookup is a dense code -> encoding array
+    n_codes = user_codes.max() + 1
+    tr_codes = user_codes[train_idx]
+    sum_tr = np.bincount(tr_codes, weights=y[train_idx], minlength=n_codes)
+    cnt_tr = np.bincount(tr_codes, minlength=n_codes)
+    smoothing_val = 1 / (1 + np.exp(-(cnt_tr - min_samples_leaf) / smoothing))
     prior = y.mean()
-    stats["enc"] = prior * (1 - smoothing_val) + stats["mean"] * smoothing_val
-    mapping = stats["enc"]
-    val_enc = np.array([mapping.get(u, prior) for u in val_user])
+    enc = prior * (1 - smoothing_val) + sum_tr / np.maximum(cnt_tr, 1) * smoothing_val
+    enc_by_code = np.where(cnt_tr > 0, enc, prior)
     full_enc = np.empty_like(y, dtype=np.float32)
-    full_enc[train_idx] = np.array([mapping.get(u, prior) for u in tr_user])
-    full_enc[val_idx] = val_enc
+    full_enc[train_idx] = enc_by_code[user_codes[train_idx]]
+    full_enc[val_idx] = enc_by_code[user_codes[val_idx]]
     return full_enc
 
 
 
 
-usernames = train_df["requester_username"].fillna("UNKNOWN").values
+def target_encode_apply(train_usernames, y, query_usernames,
+                        min_samples_leaf=100, smoothing=10):
+    agg = pd.DataFrame({"user": train_usernames, "target": y})
+    stats = agg.groupby("user")["target"].agg(["mean", "count"])
+    s = 1 / (1 + np.exp(-(stats["count"] - min_samples_leaf) / smoothing))
+    prior = float(y.mean())
+    enc = prior * (1 - s) + stats["mean"] * s
+    return pd.Series(query_usernames).map(enc).fillna(prior).to_numpy(dtype=np.float32)
+
+
+
+
+usernames = train_df["requester_username"].fillna("UNKNOWN").to_numpy()
+user_codes, _ = pd.factorize(usernames)
+test_usernames = test_df["requester_username"].fillna("UNKNOWN").to_numpy()
 
 
 # --------------------------------------------------------------
 # 9. 5-fold CV - train LightGBM & CatBoost, blend predictions
+#    (the fold models also predict the test set, see section 10)
 # --------------------------------------------------------------
 skf = StratifiedKFold(n_splits=5, shuffle=True, random_state=SEED)
 fold_aucs = []
@@ -291,60 +449,105 @@ assert dense_train.shape[0] == N == X_train.shape[0] == len(usernames)
 assert dense_test.shape[0]  == len(test_df)
 
 
-for fold, (tr_idx, val_idx) in enumerate(skf.split(X_train, y)):
-    # ----- LightGBM -----
-    assert tr_idx.max() < N and val_idx.max() < N
+lgb_params = {
+    "objective": "binary",
+    "metric": "auc",
+    "learning_rate": 0.05,
+    "feature_fraction": 0.9,
+    "bagging_fraction": 0.8,
+    "bagging_freq": 5,
+    "verbosity": -1,
+    "seed": SEED,
+    "num_threads": 12,
+    "max_bin": 255,
+    "feature_pre_filter": False,
+}
+cat_device_params = {"thread_count": 12}
+
+
+# Both boosters build histograms / scan splits on the GPU when there is one
+if DEVICE.type == "cuda":
+    lgb_params.update({
+        "device": "gpu",
+        "gpu_platform_id": 0,
+        "gpu_device_id": 0,
+        "max_bin": 63,
+        "gpu_use_dp": False,
+    })
+    cat_device_params = {"task_type": "GPU", "devices": "0"}
+
+
+# CatBoost frame, built once for all folds, with the raw username column
+# and the raw request text, which CatBoost tokenizes once and turns into
+# BoW / BM25 features in C++
+cat_all_df = pd.DataFrame(dense_train, copy=False)
+cat_all_df["username"] = usernames
+cat_all_df["request_text_edit_aware"] = train_df["request_text_edit_aware"].fillna("").to_numpy()
+cat_features = ["username"]
+text_features = ["request_text_edit_aware"]
+cat_text_processing = {
+    "tokenizers": [{"tokenizer_id": "Space", "separator_type": "ByDelimiter", "lowercasing": "true"}],
+    "dictionaries": [
+        {"dictionary_id": "Word", "gram_order": "1"},
+        {"dictionary_id": "BiGram", "gram_order": "2"},
+    ],
+    "feature_processing": {
+        "default": [{
+            "dictionaries_names": ["BiGram", "Word"],
+            # BM25 is CPU-only in CatBoost
+            "feature_calcers": ["BoW"] if DEVICE.type == "cuda" else ["BoW", "BM25"],
+            "tokenizers_names": ["Space"],
+        }],
+    },
+}
 
 
-    te_enc = target_encode(tr_idx, val_idx, y, usernames)
-    X_tr_lgb = X_train[tr_idx]
-    X_val_lgb = X_train[val_idx]
-    te_tr = sparse.csr_matrix(te_enc[tr_idx].reshape(-1, 1))
-    te_val = sparse.csr_matrix(te_enc[val_idx].reshape(-1, 1))
-    X_tr_lgb = sparse.hstack([X_tr_lgb, te_tr],  format="csr")
-    X_val_lgb = sparse.hstack([X_val_lgb, te_val], format="csr")
+df_test = pd.DataFrame(dense_test)
+df_test["username"] = test_usernames
+df_test["request_text_edit_aware"] = test_df["request_text_edit_aware"].fillna("").to_numpy()
+cat_test = Pool(df_test, cat_features=cat_features, text_features=text_features)
+
+
+# Bin X_train once; each fold takes row subsets of it and only bins its
+# own target-encoding column
+master_ds = lgb.Dataset(X_train, label=y, params=lgb_params, free_raw_data=False).construct()
+
+
+def run_fold(tr_idx, val_idx):
+    # ----- LightGBM -----
+    assert tr_idx.max() < N and val_idx.max() < N
 
 
-    lgb_train = lgb.Dataset(X_tr_lgb, label=y[tr_idx])
-    lgb_val = lgb.Dataset(X_val_lgb, label=y[val_idx], reference=lgb_train)
+    te_enc = target_encode(tr_idx, val_idx, y, user_codes)
+    te_tr = te_enc[tr_idx].reshape(-1, 1)
+    te_val = te_enc[val_idx].reshape(-1, 1)
+    te_tr_ds = lgb.Dataset(te_tr, params=lgb_params).construct()
+    te_val_ds = lgb.Dataset(te_val, reference=te_tr_ds, params=lgb_params).construct()
 
 
-    lgb_params = {
-        "objective": "binary",
-        "metric": "auc",
-        "learning_rate": 0.05,
-        "feature_fraction": 0.9,
-        "bagging_fraction": 0.8,
-        "bagging_freq": 5,
-        "verbosity": -1,
-        "seed": SEED,
-        "num_threads": 12,
-    }
+    lgb_train = master_ds.subset(tr_idx).construct().add_features_from(te_tr_ds)
+    lgb_val = master_ds.subset(val_idx).construct().add_features_from(te_val_ds)
 
 
     lgb_model = lgb.train(
-        lgb_params,
+        {**lgb_params, "num_threads": fold_threads},
         lgb_train,
         num_boost_round=2000,
         valid_sets=[lgb_val],
         callbacks=[lgb.early_stopping(stopping_rounds=50, verbose=False)],
     )
+    X_val_lgb = np.hstack([X_train[val_idx], te_val])
     lgb_val_pred = lgb_model.predict(X_val_lgb)
+    # Test rows are encoded from this fold's training users only
+    te_test = target_encode_apply(usernames[tr_idx], y[tr_idx], test_usernames)
+    lgb_test_pred = lgb_model.predict(np.hstack([X_test, te_test.reshape(-1, 1)]))
 
 
     # ----- CatBoost -----
-    # Build DataFrames that include the raw username column
-    df_tr = pd.DataFrame(dense_train[tr_idx])
-    df_tr["username"] = usernames[tr_idx]
-    df_val = pd.DataFrame(
-        dense_train[val_idx]
-    )  # NOTE: we need test-like shape for validation
-    df_val["username"] = usernames[val_idx]
-
-
-    cat_features = ["username"]
-    cat_tr = Pool(data=df_tr, label=y[tr_idx], cat_features=cat_features)
-    cat_val = Pool(data=df_val, label=y[val_idx], cat_features=cat_features)
+    cat_tr = Pool(data=cat_all_df.iloc[tr_idx], label=y[tr_idx],
+                  cat_features=cat_features, text_features=text_features)
+    cat_val = Pool(data=cat_all_df.iloc[val_idx], label=y[val_idx],
+                   cat_features=cat_features, text_features=text_features)
 
 
     cat_model = CatBoostClassifier(
@@ -356,110 +559,49 @@ for fold, (tr_idx, val_idx) in enumerate(skf.split(X_train, y)):
         early_stopping_rounds=100,
         verbose=False,
         random_seed=SEED,
-        thread_count=12,
+        text_processing=cat_text_processing,
+        **fold_cat_params,
     )
     cat_model.fit(cat_tr, eval_set=cat_val, use_best_model=True)
 
 
     cat_val_pred = cat_model.predict_proba(cat_val)[:, 1]
+    cat_test_pred = cat_model.predict_proba(cat_test)[:, 1]
 
 
     # ----- Blend -----
     blended_val = 0.5 * lgb_val_pred + 0.5 * cat_val_pred
-    oof_preds[val_idx] = blended_val
     auc = roc_auc_score(y[val_idx], blended_val)
-    fold_aucs.append(auc)
-    print(f"Fold {fold+1} AUC (blend): {auc:.5f}")
+    return val_idx, blended_val, auc, lgb_test_pred, cat_test_pred
 
 
-print(f"\nMean 5-fold AUC (blend): {np.mean(fold_aucs):.5f}")
 
 
-# --------------------------------------------------------------
-# 10. Retrain on full data (with internal hold-out) and predict test
-# --------------------------------------------------------------
-val_frac = 0.1
-val_size = int(len(y) * val_frac)
-perm = np.random.RandomState(SEED).permutation(len(y))
-val_idx = perm[:val_size]
-train_idx = perm[val_size:]
+# Folds run concurrently in threads: both boosters release the GIL while
+# training and threads share master_ds / cat_all_df without copying them.
+# Each fold gets an even share of the cores; on the GPU folds run one at a time
+n_fold_jobs = 1 if DEVICE.type == "cuda" else skf.get_n_splits()
+fold_threads = max(1, (os.cpu_count() or 1) // n_fold_jobs)
+fold_cat_params = cat_device_params if DEVICE.type == "cuda" else {"thread_count": fold_threads}
 
 
-# LightGBM full training
-te_full = target_encode(train_idx, val_idx, y, usernames)
-X_full_lgb = X_train[train_idx]
-X_val_lgb = X_train[val_idx]
-X_full_lgb = sparse.hstack([X_full_lgb, te_full[train_idx][:, None]])
-X_val_lgb = sparse.hstack([X_val_lgb, te_full[val_idx][:, None]])
-
-
-lgb_train = lgb.Dataset(X_full_lgb, label=y[train_idx])
-lgb_val = lgb.Dataset(X_val_lgb, label=y[val_idx], reference=lgb_train)
-
-
-lgb_model_full = lgb.train(
-    lgb_params,
-    lgb_train,
-    num_boost_round=2000,
-    valid_sets=[lgb_val],
-    callbacks=[lgb.early_stopping(stopping_rounds=50, verbose=False)],
+results = Parallel(n_jobs=n_fold_jobs, backend="threading")(
+    delayed(run_fold)(tr_idx, val_idx) for tr_idx, val_idx in skf.split(X_train, y)
 )
+for fold, (val_idx, blended_val, auc, *_) in enumerate(results):
+    oof_preds[val_idx] = blended_val
+    fold_aucs.append(auc)
+    print(f"Fold {fold+1} AUC (blend): {auc:.5f}")
 
 
-def target_encode_apply(train_usernames, y, query_usernames,
-                        min_samples_leaf=100, smoothing=10):
-    agg = pd.DataFrame({"user": train_usernames, "target": y})
-    stats = agg.groupby("user")["target"].agg(["mean", "count"])
-    s = 1 / (1 + np.exp(-(stats["count"] - min_samples_leaf) / smoothing))
-    prior = float(y.mean())
-    enc = prior * (1 - s) + stats["mean"] * s
-    mapping = enc.to_dict()
-    return np.array([mapping.get(u, prior) for u in query_usernames], dtype=np.float32)
-
-
-test_usernames = test_df["requester_username"].fillna("UNKNOWN").values
-
-
-te_test = target_encode_apply(usernames, y, test_usernames)          # shape (len(test),)
-X_test_lgb = sparse.hstack(
-    [X_test, sparse.csr_matrix(te_test.reshape(-1, 1))], format="csr"
-)
-
-
-test_pred_lgb = lgb_model_full.predict(X_test_lgb, num_iteration=lgb_model_full.best_iteration)
-
-
-# CatBoost full training
-df_full = pd.DataFrame(dense_train[train_idx])
-df_full["username"] = usernames[train_idx]
-df_val_full = pd.DataFrame(dense_train[val_idx])
-df_val_full["username"] = usernames[val_idx]
-
-
-cat_tr_full = Pool(data=df_full, label=y[train_idx], cat_features=["username"])
-cat_val_full = Pool(data=df_val_full, label=y[val_idx], cat_features=["username"])
-
-
-cat_model_full = CatBoostClassifier(
-    iterations=3000,
-    learning_rate=0.03,
-    depth=6,
-    loss_function="Logloss",
-    eval_metric="AUC",
-    early_stopping_rounds=100,
-    verbose=False,
-    random_seed=SEED,
-    thread_count=12,
-)
-cat_model_full.fit(cat_tr_full, eval_set=cat_val_full, use_best_model=True)
-
-
-test_usernames = test_df["requester_username"].fillna("UNKNOWN").values
-df_test = pd.DataFrame(dense_test)
-df_test["username"] = test_usernames
+print(f"\nMean 5-fold AUC (blend): {np.mean(fold_aucs):.5f}")
 
 
-test_pred_cat = cat_model_full.predict_proba(Pool(df_test, cat_features=["username"]))[:, 1]
+# --------------------------------------------------------------
+# 10. Test predictions: average of the fold models
+# --------------------------------------------------------------
+test_pred_lgb = np.mean([pred_lgb for *_, pred_lgb, _ in results], axis=0)
+test_pred_cat = np.mean([pred_cat for *_, pred_cat in results], axis=0)
 
 
 # Blend test predictions
@@ -3,10 +3,12 @@
 Test authorization and admin privileges
 """
 
-import requests
-import time
+import asyncio
+import httpx
 import sys
 import json
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
 BASE_URL = "http://localhost:8001"
 
@@ -15,17 +17,51 @@ SARANG_TOKEN = "test_token_regular"
 BOB_TOKEN = "test_token_bob"
 ADMIN_TOKEN = "test_token_admin"
 
+# Shared async client so all requests reuse one keep-alive pool
+# (no timeout: submissions wait for the job to finish)
+CLIENT = httpx.AsyncClient(
+    base_url=BASE_URL,
+    timeout=None,
+    limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+)
+
+@lru_cache(maxsize=32)
+def _build_body(code: str, config_json: str) -> Tuple[bytes, str]:
+    """
+    Encode a submission's multipart body once per (code, config)
+    Returns: (body, content_type)
+    """
+    request = httpx.Request("POST", f"{BASE_URL}/api/submit", files={
+        'code': ('solution.py', code, 'text/x-python'),
+        'config_file': ('config.json', config_json, 'application/json')
+    })
+    return request.read(), request.headers['Content-Type']
+
+async def submit_and_fetch_status(code: str, job_config: dict, viewer_tokens: List[str]) -> Tuple[httpx.Response, Optional[str], List[httpx.Response]]:
+    """
+    Submit code, then fetch the job's status as every viewer at once
+    Returns: (submit response, job_id, status response per viewer)
+    """
+    body, content_type = _build_body(code, json.dumps(job_config))
+    response = await CLIENT.post("/api/submit", content=body, headers={'Content-Type': content_type})
+    job_id = response.json().get('job_id')
+    statuses = await asyncio.gather(*(
+        CLIENT.get(f"/api/status/{job_id}", headers={'Authorization': f'Bearer {token}'})
+        for token in viewer_tokens
+    ))
+    return response, job_id, statuses
+
 def print_test(name):
     print(f"\n{'='*60}")
     print(f"Test: {name}")
     print('='*60)
 
-def test_user_can_only_see_own_jobs():
+async def test_user_can_only_see_own_jobs():
     """Test that users can only view their own jobs"""
     print_test("User can only view own jobs")
     
     # Submit job as sarang
-    job_config = {
+    sarang_config = {
         'competition_id': 'test-comp',
         'project_id': 'test-proj',
         'user_id': 'sarang',
@@ -33,18 +69,8 @@ def test_user_can_only_see_own_jobs():
         'token': SARANG_TOKEN
     }
     
-    files = {
-        'code': ('solution.py', 'print("sarang job")\n', 'text/x-python'),
-        'config_file': ('config.json', json.dumps(job_config), 'application/json')
-    }
-    
-    response = requests.post(f"{BASE_URL}/api/submit", files=files)
-    print(f"Submit as sarang: {response.status_code}")
-    sarang_job_id = response.json().get('job_id')
-    print(f"Sarang job ID: {sarang_job_id}")
-    
     # Submit job as bob
-    job_config = {
+    bob_config = {
         'competition_id': 'test-comp',
         'project_id': 'test-proj',
         'user_id': 'bob',
@@ -52,19 +78,21 @@ def test_user_can_only_see_own_jobs():
         'token': BOB_TOKEN
     }
     
-    files = {
-        'code': ('solution.py', 'print("bob job")\n', 'text/x-python'),
-        'config_file': ('config.json', json.dumps(job_config), 'application/json')
-    }
+    # Different users, so both jobs (and then all four status checks:
+    # each job viewed by the other user and by its owner) run at once
+    (sarang_response, sarang_job_id, (bob_views_sarang, sarang_views_own)), \
+        (bob_response, bob_job_id, (sarang_views_bob, bob_views_own)) = await asyncio.gather(
+            submit_and_fetch_status('print("sarang job")\n', sarang_config, [BOB_TOKEN, SARANG_TOKEN]),
+            submit_and_fetch_status('print("bob job")\n', bob_config, [SARANG_TOKEN, BOB_TOKEN])
+        )
+    print(f"Submit as sarang: {sarang_response.status_code}")
+    print(f"Sarang job ID: {sarang_job_id}")
     
-    response = requests.post(f"{BASE_URL}/api/submit", files=files)
-    print(f"Submit as bob: {response.status_code}")
-    bob_job_id = response.json().get('job_id')
+    print(f"Submit as bob: {bob_response.status_code}")
     print(f"Bob job ID: {bob_job_id}")
     
     # Try to view sarang's job as bob (should fail)
-    headers = {'Authorization': f'Bearer {BOB_TOKEN}'}
-    response = requests.get(f"{BASE_URL}/api/status/{sarang_job_id}", headers=headers)
+    response = bob_views_sarang
     print(f"\nBob viewing Sarang's job: {response.status_code}")
     if response.status_code == 403:
         print("✓ Correctly denied access")
@@ -73,8 +101,7 @@ def test_user_can_only_see_own_jobs():
         return False
     
     # Try to view bob's job as sarang (should fail)
-    headers = {'Authorization': f'Bearer {SARANG_TOKEN}'}
-    response = requests.get(f"{BASE_URL}/api/status/{bob_job_id}", headers=headers)
+    response = sarang_views_bob
     print(f"Sarang viewing Bob's job: {response.status_code}")
     if response.status_code == 403:
         print("✓ Correctly denied access")
@@ -83,8 +110,7 @@ def test_user_can_only_see_own_jobs():
         return False
     
     # Verify sarang can view their own job
-    headers = {'Authorization': f'Bearer {SARANG_TOKEN}'}
-    response = requests.get(f"{BASE_URL}/api/status/{sarang_job_id}", headers=headers)
+    response = sarang_views_own
     print(f"\nSarang viewing own job: {response.status_code}")
     if response.status_code == 200:
         print("✓ Can view own job")
@@ -93,8 +119,7 @@ def test_user_can_only_see_own_jobs():
         return False
     
     # Verify bob can view their own job
-    headers = {'Authorization': f'Bearer {BOB_TOKEN}'}
-    response = requests.get(f"{BASE_URL}/api/status/{bob_job_id}", headers=headers)
+    response = bob_views_own
     print(f"Bob viewing own job: {response.status_code}")
     if response.status_code == 200:
         print("✓ Can view own job")
@@ -104,7 +129,7 @@ def test_user_can_only_see_own_jobs():
     
     return True
 
-def test_admin_can_view_all_jobs():
+async def test_admin_can_view_all_jobs():
     """Test that admin can view all jobs"""
     print_test("Admin can view all jobs")
     
@@ -117,19 +142,15 @@ def test_admin_can_view_all_jobs():
         'token': SARANG_TOKEN
     }
     
-    files = {
-        'code': ('solution.py', 'print("admin test")\n', 'text/x-python'),
-        'config_file': ('config.json', json.dumps(job_config), 'application/json')
-    }
-    
-    response = requests.post(f"{BASE_URL}/api/submit", files=files)
+    response, sarang_job_id, (admin_view,) = await submit_and_fetch_status(
+        'print("admin test")\n', job_config, [ADMIN_TOKEN]
+    )
     print(f"Submit as sarang: {response.status_code}")
-    sarang_job_id = response.json().get('job_id')
     print(f"Sarang job ID: {sarang_job_id}")
     
     # Admin views sarang's job (should succeed)
     headers = {'Authorization': f'Bearer {ADMIN_TOKEN}'}
-    response = requests.get(f"{BASE_URL}/api/status/{sarang_job_id}", headers=headers)
+    response = admin_view
     print(f"\nAdmin viewing Sarang's job: {response.status_code}")
     if response.status_code == 200:
         print("✓ Admin can view user's job")
@@ -139,8 +160,8 @@ def test_admin_can_view_all_jobs():
         return False
     
     # Admin can also view results
-    time.sleep(2)  # Wait for job to complete
-    response = requests.get(f"{BASE_URL}/api/results/{sarang_job_id}", headers=headers)
+    await asyncio.sleep(2)  # Wait for job to complete
+    response = await CLIENT.get(f"/api/results/{sarang_job_id}", headers=headers)
     print(f"Admin viewing results: {response.status_code}")
     if response.status_code == 200:
         print("✓ Admin can view job results")
@@ -150,7 +171,7 @@ def test_admin_can_view_all_jobs():
     
     return True
 
-def test_admin_can_cancel_any_job():
+async def test_admin_can_cancel_any_job():
     """Test that admin can cancel any user's job (authorization check)"""
     print_test("Admin can cancel any job")
     
@@ -163,19 +184,16 @@ def test_admin_can_cancel_any_job():
         'token': SARANG_TOKEN
     }
     
-    files = {
-        'code': ('solution.py', 'print("test")\n', 'text/x-python'),
-        'config_file': ('config.json', json.dumps(job_config), 'application/json')
-    }
+    body, content_type = _build_body('print("test")\n', json.dumps(job_config))
     
-    response = requests.post(f"{BASE_URL}/api/submit", files=files)
+    response = await CLIENT.post("/api/submit", content=body, headers={'Content-Type': content_type})
     print(f"Submit job as sarang: {response.status_code}")
     sarang_job_id = response.json().get('job_id')
     print(f"Sarang job ID: {sarang_job_id}")
     
     # Try to cancel as bob (should fail with 403)
     headers = {'Authorization': f'Bearer {BOB_TOKEN}'}
-    response = requests.post(f"{BASE_URL}/api/cancel/{sarang_job_id}", headers=headers)
+    response = await CLIENT.post(f"/api/cancel/{sarang_job_id}", headers=headers)
     print(f"\nBob cancelling Sarang's job: {response.status_code}")
     if response.status_code == 403:
         print("✓ Regular user correctly denied")
@@ -189,7 +207,7 @@ def test_admin_can_cancel_any_job():
     
     # Admin can cancel (or attempt to) - should not get 403
     headers = {'Authorization': f'Bearer {ADMIN_TOKEN}'}
-    response = requests.post(f"{BASE_URL}/api/cancel/{sarang_job_id}", headers=headers)
+    response = await CLIENT.post(f"/api/cancel/{sarang_job_id}", headers=headers)
     print(f"\nAdmin cancelling Sarang's job: {response.status_code}")
     
     if response.status_code == 200:
@@ -207,13 +225,13 @@ def test_admin_can_cancel_any_job():
     
     return True
 
-def test_list_jobs_filtered():
+async def test_list_jobs_filtered():
     """Test that list jobs filters by user"""
     print_test("List jobs filtered by user")
     
     # List jobs as sarang
     headers = {'Authorization': f'Bearer {SARANG_TOKEN}'}
-    response = requests.get(f"{BASE_URL}/api/jobs", headers=headers)
+    response = await CLIENT.get("/api/jobs", headers=headers)
     print(f"Sarang listing jobs: {response.status_code}")
     
     if response.status_code == 200:
@@ -233,7 +251,7 @@ def test_list_jobs_filtered():
     
     # Admin lists all jobs
     headers = {'Authorization': f'Bearer {ADMIN_TOKEN}'}
-    response = requests.get(f"{BASE_URL}/api/jobs", headers=headers)
+    response = await CLIENT.get("/api/jobs", headers=headers)
     print(f"\nAdmin listing jobs: {response.status_code}")
     
     if response.status_code == 200:
@@ -254,7 +272,7 @@ def test_list_jobs_filtered():
     
     return True
 
-def main():
+async def main():
     print(f"\nTesting Authorization at {BASE_URL}")
     print("="*60)
     
@@ -270,7 +288,7 @@ def main():
     
     for test in tests:
         try:
-            if test():
+            if await test():
                 passed += 1
                 print(f"\n✓ {test.__name__} PASSED")
             else:
@@ -280,7 +298,9 @@ def main():
             failed += 1
             print(f"\n✗ {test.__name__} FAILED with exception: {e}")
         
-        time.sleep(1)
+        await asyncio.sleep(1)
+    
+    await CLIENT.aclose()
     
     print(f"\n{'='*60}")
     print(f"Results: {passed} passed, {failed} failed")
@@ -289,5 +309,5 @@ def main():
     return 0 if failed == 0 else 1
 
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.exit(asyncio.run(main()))
 
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Test the code scanner's static fast path (no server or API call needed):
+1. Clean code importing only whitelisted ML libraries skips the LLM
+2. Import-free code still gets the LLM review
+3. Non-ML imports still get the LLM review
+4. Reflection / string building still gets the LLM review
+5. A decorator on a flagged function is reported once
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from code_scanner import CodeScanner
+
+scanner = CodeScanner(api_key="test")
+
+CASES = [
+    ("Whitelisted ML imports", "import numpy as np\nimport pandas as pd\nprint(np.zeros(3))\n", True),
+    ("No imports", "x = 1\nprint(x)\n", False),
+    ("Non-ML import", "import requests\nprint(requests.get)\n", False),
+    ("Mixed ML and non-ML imports", "import numpy as np\nimport json\nprint(json.dumps([1]))\n", False),
+    ("Reflection with ML import", "import numpy as np\ngetattr(__builtins__, 'ex'+'ec')('print(1)')\n", False),
+]
+
+passed = 0
+failed = 0
+
+for name, code, expected in CASES:
+    trusted = scanner._is_trusted(code, scanner._static_analysis(code))
+    if trusted == expected:
+        passed += 1
+        print(f"✅ {name}: {'trusted' if trusted else 'sent to LLM'}")
+    else:
+        failed += 1
+        print(f"❌ {name}: expected {'trusted' if expected else 'LLM review'}, got {'trusted' if trusted else 'LLM review'}")
+
+# Decorated function whose body is also walked: each finding reported once
+code = "import os\n@eval('1')\ndef f():\n    os.system('ls')\n"
+critical = scanner._static_analysis(code)['critical']
+if critical.count("Dangerous function: eval()") == 1:
+    passed += 1
+    print("✅ Decorator findings reported once")
+else:
+    failed += 1
+    print(f"❌ Decorator findings duplicated: {critical}")
+
+print(f"\nResults: {passed} passed, {failed} failed")
+sys.exit(0 if failed == 0 else 1)
@@ -10,6 +10,7 @@ from typing import List
 import config
 import models
 from queue_manager import queue_manager
+from job_events import job_events
 from ssh_executor import SSHExecutor
 
 
@@ -82,8 +83,7 @@ class Worker(threading.Thread):
             if node_state and node_state.is_busy:
                 # Node is busy, put job back in queue and return
                 print(f"Node {self.node_id} is already busy, re-queuing job {job_id}")
-                with queue_manager.lock:
-                    queue_manager.node_queues[self.node_id].appendleft(job_id)
+                queue_manager.requeue_front(self.node_id, job_id)
                 return
             
             # Get job from database
@@ -107,8 +107,7 @@ class Worker(threading.Thread):
                     print(f"Node {self.node_id} was claimed by another process, re-queuing job {job_id}")
                     job.status = "pending"
                     db.commit()
-                    with queue_manager.lock:
-                        queue_manager.node_queues[self.node_id].appendleft(job_id)
+                    queue_manager.requeue_front(self.node_id, job_id)
                     return
                 
                 node_state.is_busy = True
@@ -208,8 +207,8 @@ class Worker(threading.Thread):
                     print(f"Container {container_name} restarted successfully")
                 else:
                     print(f"Warning: Failed to restart container {container_name}")
-                    # Disconnect and reconnect anyway
-                    self.executor.disconnect()
+                    # Drop the connection, the container may be half restarted
+                    self.executor.disconnect(discard=True)
             else:
                 self.executor.disconnect()
             
@@ -228,6 +227,8 @@ class Worker(threading.Thread):
             # Mark node as not busy
             queue_manager.job_completed(self.node_id, job.expected_time)
             db.close()
+            # Wake any API handler waiting on this job
+            job_events.publish(job_id)
     
     def stop(self):
         """Stop the worker thread"""